@@ -0,0 +1,128 @@
+from hand import Hand
+from score_table import SCORE_TABLE, RANK_KEYS, count_hand, count_upcards
+from crib_table import NUM_PAIR_ENTRIES, crib_points, get_table
+from math import sqrt
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+import time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Get stats about how a potential 4-card keep scores with every possible upcard
+# Returns the hand along with its average, standard deviation, and which upcards lead to its max/min scores
+def evaluate_keep(keep, upcards):
+    counts = count_upcards(keep, upcards)
+    num_upcards = len(counts)
+    total = sum(counts)
+    max_count = max(counts)
+    min_count = min(counts)
+    # Standard deviation from exact integer sums, so it's a single square root
+    variance_numerator = num_upcards * sum(count * count for count in counts) - total * total
+    return {'hand': Hand(list(keep)),
+            'avg': total / num_upcards,
+            'max': [(upcard, count) for upcard, count in zip(upcards, counts) if count == max_count],
+            'min': [(upcard, count) for upcard, count in zip(upcards, counts) if count == min_count],
+            'std_dev': sqrt(variance_numerator) / num_upcards}
+
+
+# Optional process pool for discard analysis, shared by every AI player
+# With 0 or 1 workers (the default) everything runs serially in this process
+workers = 0
+executor = None
+
+
+# Set the number of worker processes. Replaces the shared pool if the count changes
+def set_workers(num_workers):
+    global workers, executor
+    if num_workers == workers:
+        return
+    if executor is not None:
+        executor.shutdown()
+        executor = None
+    workers = num_workers
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+
+def evaluate_keep_batch(keeps, upcards):
+    return [evaluate_keep(keep, upcards) for keep in keeps]
+
+
+# Evaluate a list of keeps against the same upcards, in the same order they were given
+# With a pool, the keeps are split into one batch per worker and the results merged back in order
+def evaluate_keeps(keeps, upcards):
+    if executor is None:
+        return evaluate_keep_batch(keeps, upcards)
+    batch_size = -(-len(keeps) // workers)
+    batches = [keeps[i:i + batch_size] for i in range(0, len(keeps), batch_size)]
+    results = []
+    for batch_results in executor.map(evaluate_keep_batch, batches, [upcards] * len(batches)):
+        results.extend(batch_results)
+    return results
+
+
+# Evaluate keeps one at a time, in the order given, until the deadline (a time.perf_counter() value) passes
+# At least the first keep is always evaluated. Returns the results for the keeps that were, in order
+def evaluate_keeps_until(keeps, upcards, deadline):
+    results = []
+    for keep in keeps:
+        if results and time.perf_counter() >= deadline:
+            break
+        results.append(evaluate_keep(keep, upcards))
+    return results
+
+
+# Estimated net points of every keep of many hands at once, from the score table and crib table alone, the same way
+# AIPlayer.estimate_discards estimates them: the keep counted as four cards, plus or minus its discard's crib points
+# Hands are lists of 5 or 6 cards, and dealer_flags says whose crib each one discards to. Returns a list with the
+# estimates for each hand, in the order combinations(hand, 4) gives its keeps
+# With NumPy, every hand of the same size is scored together in a handful of array operations
+def estimate_keeps(hands, dealer_flags):
+    if np is None:
+        return [[estimate_keep(keep, [card for card in hand if card not in keep], dealer)
+                 for keep in combinations(hand, 4)] for hand, dealer in zip(hands, dealer_flags)]
+    estimates = [None] * len(hands)
+    for hand_size in {len(hand) for hand in hands}:
+        group = [index for index, hand in enumerate(hands) if len(hand) == hand_size]
+        keep_slots, discard_slots = KEEP_SLOTS[hand_size]
+        cards = np.array([[card.index for card in hands[index]] for index in group], dtype=np.int64)
+        ranks = cards // 4 + 1
+        suits = cards & 3
+        # Fifteens, pairs, and runs from the score table, which is searched by rank key. Four cards of a suit are a
+        # four-card flush, as they are in count_hand when there's no upcard
+        keep_suits = suits[:, keep_slots]
+        points = SCORE_POINTS[np.searchsorted(SCORE_KEYS, RANK_KEY_ARRAY[ranks[:, keep_slots]].sum(axis=2))] + \
+            4 * (keep_suits == keep_suits[:, :, :1]).all(axis=2)
+        discard_ranks = ranks[:, discard_slots]
+        if discard_slots.shape[1] == 2:
+            discard_suits = suits[:, discard_slots]
+            crib_index = ((discard_ranks[:, :, 0] - 1) * 13 + discard_ranks[:, :, 1] - 1) * 2 + \
+                (discard_suits[:, :, 0] == discard_suits[:, :, 1])
+        else:
+            crib_index = NUM_PAIR_ENTRIES + discard_ranks[:, :, 0] - 1
+        crib = np.asarray(get_table(), dtype=np.float64)[crib_index]
+        dealer = np.array([dealer_flags[index] for index in group], dtype=bool)[:, None]
+        for index, row in zip(group, np.where(dealer, points + crib, points - crib)):
+            estimates[index] = row
+    return estimates
+
+
+# Estimated net points of one keep and its discard
+def estimate_keep(keep, discard, dealer):
+    points = count_hand(keep)
+    crib = crib_points(discard)
+    return points + crib if dealer else points - crib
+
+
+if np is not None:
+    # Slots of each keep and its discard in a hand of 5 or 6 cards, in combinations() order
+    KEEP_SLOTS = {hand_size: (np.array(list(combinations(range(hand_size), 4))),
+                              np.array([[slot for slot in range(hand_size) if slot not in keep]
+                                        for keep in combinations(range(hand_size), 4)]))
+                  for hand_size in (5, 6)}
+    RANK_KEY_ARRAY = np.array(RANK_KEYS, dtype=np.int64)
+    SCORE_KEYS = np.array(sorted(SCORE_TABLE), dtype=np.int64)
+    SCORE_POINTS = np.array([SCORE_TABLE[key] for key in sorted(SCORE_TABLE)], dtype=np.int64)
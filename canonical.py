@@ -0,0 +1,111 @@
+from card import Card, DECK
+from itertools import permutations
+
+
+# Suit-isomorphism canonical forms
+# Relabelling the suits of a set of cards doesn't change how it scores, so any set of cards can be mapped to a canonical
+# representative: each suit is reduced to a 13-bit mask of the ranks held in it, and the suits are relabelled so those
+# masks come out in descending order. The four masks concatenated make the canonical key.
+# An upcard and other known cards (discards, cards already played) can be folded into the same relabelling, in which
+# case they break ties between suits that hold the same ranks and become part of the key
+
+NUM_SLOTS = len(Card.SUITS)
+# For every suit permutation, the card each card int maps to, so relabelling a card is a single tuple index
+CARD_MAPS = {permutation: tuple(DECK[(index & ~3) | permutation[index & 3]] for index in range(52))
+             for permutation in permutations(range(NUM_SLOTS))}
+
+
+# Per-suit 13-bit masks of the ranks in a set of cards, in Card.SUITS order
+def suit_masks(cards):
+    masks = [0] * NUM_SLOTS
+    for card in cards:
+        masks[card.index & 3] |= 1 << (card.num_rank - 1)
+    return masks
+
+
+# Map a set of cards to its canonical key and a suit permutation
+# permutation[slot] is the canonical suit slot that the suit in Card.SUITS[slot] is relabelled to
+# With no upcard or known cards the key is an int of the four suit masks. Otherwise it's a tuple of that int, the
+# canonical card int of the upcard (-1 if there isn't one), and the same kind of int for the known cards
+def canonicalize(cards, upcard=None, known_cards=None):
+    masks = suit_masks(cards)
+    if upcard is None and known_cards is None:
+        order = sorted(range(NUM_SLOTS), key=masks.__getitem__, reverse=True)
+    else:
+        upcard_masks = suit_masks([upcard] if upcard is not None and upcard.index >= 0 else [])
+        known_masks = suit_masks(known_cards or [])
+        order = sorted(range(NUM_SLOTS), key=lambda slot: (masks[slot], upcard_masks[slot], known_masks[slot]),
+                       reverse=True)
+    key = 0
+    permutation = [0] * NUM_SLOTS
+    for canonical_slot, slot in enumerate(order):
+        key = key << 13 | masks[slot]
+        permutation[slot] = canonical_slot
+    permutation = tuple(permutation)
+    if upcard is None and known_cards is None:
+        return key, permutation
+    known_key = 0
+    for slot in order:
+        known_key = known_key << 13 | known_masks[slot]
+    upcard_index = to_canonical(upcard, permutation).index if upcard is not None and upcard.index >= 0 else -1
+    return (key, upcard_index, known_key), permutation
+
+
+# The permutation that undoes a permutation
+def inverse_permutation(permutation):
+    inverse = [0] * NUM_SLOTS
+    for slot, canonical_slot in enumerate(permutation):
+        inverse[canonical_slot] = slot
+    return tuple(inverse)
+
+
+# Relabel an actual card into its canonical suit
+def to_canonical(card, permutation):
+    return CARD_MAPS[permutation][card.index]
+
+
+# Relabel a canonical card back into the suit it came from, given the permutation canonicalize returned
+def from_canonical(card, permutation):
+    return CARD_MAPS[inverse_permutation(permutation)][card.index]
+
+
+# Relabel a whole list of canonical cards back into their original suits
+def cards_from_canonical(cards, permutation):
+    card_map = CARD_MAPS[inverse_permutation(permutation)]
+    return [card_map[card.index] for card in cards]
+
+
+# The canonical cards of a key, in canonical order: by canonical suit slot, then by rank
+def key_cards(key):
+    cards = []
+    for canonical_slot in range(NUM_SLOTS):
+        mask = key >> (13 * (NUM_SLOTS - 1 - canonical_slot)) & 0x1FFF
+        cards.extend(Card(num_rank, Card.SUITS[canonical_slot]) for num_rank in range(1, 14)
+                     if mask >> (num_rank - 1) & 1)
+    return cards
+
+
+# Sort actual cards into the same order as the canonical cards of their key
+def canonical_order(cards, permutation):
+    return sorted(cards, key=lambda card: (permutation[card.index & 3], card.num_rank))
+
+
+# Every canonical key of num_cards cards, in ascending order
+def all_keys(num_cards):
+    masks_by_size = [[] for _ in range(14)]
+    for mask in range(1 << 13):
+        masks_by_size[bin(mask).count('1')].append(mask)
+
+    # Pick suit masks in descending order, each no bigger than the one before it
+    def extend(key, slots_left, cards_left, max_mask):
+        if slots_left == 0:
+            if cards_left == 0:
+                yield key
+            return
+        for size in range(min(cards_left, 13) + 1):
+            for mask in masks_by_size[size]:
+                if mask > max_mask:
+                    break
+                yield from extend(key << 13 | mask, slots_left - 1, cards_left - size, mask)
+
+    return sorted(extend(0, NUM_SLOTS, num_cards, 0x1FFF))
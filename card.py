@@ -1,65 +1,108 @@
 from colorama import Fore, Back, Style
 
 
+# Cards are flyweights: there is exactly one immutable instance of each of the 52 cards, plus 13 rank-only wildcards
+# (suit '0') and a blank card (rank 0) for unset upcards. Card(num_rank, suit) hands back the shared instance, so
+# equality is identity and cards can be hashed and compared in sets and dicts in O(1)
 class Card:
+    __slots__ = ('num_rank', 'suit', 'rank', 'value', 'index', 'bit', '_hash', '_str')
+    # Suit order used for the integer encoding of a card. Matches the order Deck deals out a fresh deck in
+    SUITS = ['c', 's', 'h', 'd']
     SPADES = Fore.LIGHTYELLOW_EX + '[s]pades ♠' + Style.RESET_ALL
     HEARTS = Fore.RED + '[h]earts ♥' + Style.RESET_ALL
     CLUBS = Fore.GREEN + '[c]lubs ♣' + Style.RESET_ALL
     DIAMONDS = Style.BRIGHT + Fore.BLUE + '[d]iamonds ♦' + Style.RESET_ALL
+    # Every canonical instance, keyed by (num_rank, suit)
+    _interned = {}
 
-    def __init__(self, num_rank=0, suit='0'):
-        self.num_rank = num_rank
-        self.suit = suit
+    def __new__(cls, num_rank=0, suit='0'):
+        try:
+            return cls._interned[(num_rank, suit)]
+        except KeyError:
+            raise ValueError(str(num_rank) + ' of ' + str(suit) + ' is not a valid card.')
+
+    # Build the canonical instance for a rank and suit. Only used to fill the interned set below
+    @classmethod
+    def _intern(cls, num_rank, suit):
+        card = object.__new__(cls)
+        set_attr = object.__setattr__
+        set_attr(card, 'num_rank', num_rank)
+        set_attr(card, 'suit', suit)
         # Give the correct rank to ace, jack, queen, and king
         if num_rank == 1:
-            self.rank = 'A'
+            rank = 'A'
         elif num_rank == 11:
-            self.rank = 'J'
+            rank = 'J'
         elif num_rank == 12:
-            self.rank = 'Q'
+            rank = 'Q'
         elif num_rank == 13:
-            self.rank = 'K'
+            rank = 'K'
         else:
-            self.rank = str(num_rank)
+            rank = str(num_rank)
+        set_attr(card, 'rank', rank)
         # Face cards still only count as 10 points
-        if num_rank > 10:
-            self.value = 10
+        set_attr(card, 'value', min(num_rank, 10))
+        # Integer encoding of the card, 0-51 with four consecutive slots per rank, and its bit in a 52-bit hand mask
+        # Cards without a real rank and suit (blank upcards and rank-only wildcards) are encoded as -1 with no bit
+        if 1 <= num_rank <= 13 and suit in cls.SUITS:
+            set_attr(card, 'index', (num_rank - 1) * 4 + cls.SUITS.index(suit))
+            set_attr(card, 'bit', 1 << card.index)
         else:
-            self.value = num_rank
-
-    # String representation should be snazzy, and str should only be used for terminal UI stuff
-    def __str__(self):
+            set_attr(card, 'index', -1)
+            set_attr(card, 'bit', 0)
+        # Rank and suit are enough to make the object unique
+        set_attr(card, '_hash', hash((rank, suit)))
+        # String representation should be snazzy, and str should only be used for terminal UI stuff
         # Spades yellow, hearts red, clubs green, diamonds blue
-        card_str = ''
-        if self.suit == 's':
-            card_str = Fore.LIGHTYELLOW_EX + self.rank + '♠' + Style.RESET_ALL
-        elif self.suit == 'h':
-            card_str = Fore.RED + self.rank + '♥' + Style.RESET_ALL
-        elif self.suit == 'c':
-            card_str = Fore.GREEN + self.rank + '♣' + Style.RESET_ALL
-        elif self.suit == 'd':
-            card_str = Style.BRIGHT + Fore.BLUE + self.rank + '♦' + Style.RESET_ALL
+        if suit == 's':
+            card_str = Fore.LIGHTYELLOW_EX + rank + '♠' + Style.RESET_ALL
+        elif suit == 'h':
+            card_str = Fore.RED + rank + '♥' + Style.RESET_ALL
+        elif suit == 'c':
+            card_str = Fore.GREEN + rank + '♣' + Style.RESET_ALL
+        elif suit == 'd':
+            card_str = Style.BRIGHT + Fore.BLUE + rank + '♦' + Style.RESET_ALL
         else:
-            card_str = str(self.rank)
-        return card_str
+            card_str = rank
+        set_attr(card, '_str', card_str)
+        cls._interned[(num_rank, suit)] = card
+        return card
 
-    # Equality is determined by rank and suit
-    def __eq__(self, other):
-        return (self.rank == other.rank and self.suit == other.suit) or (self.rank == other.rank and self.suit == '0')
+    def __setattr__(self, key, value):
+        raise AttributeError('Cards are immutable.')
+
+    def __str__(self):
+        return self._str
 
     # Less than is determined by rank
     def __lt__(self, other):
         return self.num_rank < other.num_rank
 
-    # Rank and suit are enough to make the object unique
     def __hash__(self):
-        return hash((self.rank, self.suit))
+        return self._hash
 
+    # Copies (and unpickled cards) are the canonical instance itself
     def __copy__(self):
-        return Card(self.num_rank, self.suit)
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Card, (self.num_rank, self.suit)
+
+    # Rank match: same numerical rank, and the same suit unless either card is a rank-only wildcard
+    def matches(self, other) -> bool:
+        return self.num_rank == other.num_rank and (self.suit == other.suit or self.suit == '0' or other.suit == '0')
 
     def follows(self, other) -> bool:
         if self.num_rank == other.num_rank + 1:
             return True
         else:
             return False
+
+
+# The 52 real cards, in the order Deck deals out a fresh deck. DECK[i].index == i
+DECK = tuple(Card._intern(num_rank, suit) for num_rank in range(1, 14) for suit in Card.SUITS)
+# The blank card followed by the 13 rank-only wildcards, so RANK_CARDS[num_rank] is the wildcard for that rank
+RANK_CARDS = tuple(Card._intern(num_rank, '0') for num_rank in range(14))
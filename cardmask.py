@@ -0,0 +1,128 @@
+from card import Card, DECK
+
+
+# Integer/bitmask card encoding and the scoring kernel behind Hand.count
+# A card is an int from 0 to 51, (num_rank - 1) * 4 + suit slot, and a set of cards is a 52-bit mask of those ints
+# Scoring works from a 13-slot rank histogram and per-suit masks, so counting a hand doesn't build any combinations
+
+# Bits belonging to each numerical rank (index 0 is unused so ranks can index directly)
+RANK_MASKS = [0] + [0xF << ((num_rank - 1) * 4) for num_rank in range(1, 14)]
+# Bits belonging to each suit, keyed by suit character
+SUIT_MASKS = {suit: sum(1 << ((num_rank - 1) * 4 + slot) for num_rank in range(1, 14))
+              for slot, suit in enumerate(Card.SUITS)}
+# Bits of the four jacks, keyed by suit character
+JACK_BITS = {suit: 1 << (10 * 4 + slot) for slot, suit in enumerate(Card.SUITS)}
+FULL_MASK = (1 << 52) - 1
+# Number of set bits in every 4-bit nibble, for turning a rank's slice of the mask into a card count
+NIBBLE_COUNTS = [bin(nibble).count('1') for nibble in range(16)]
+# Counting value of each numerical rank, face cards count as 10
+RANK_VALUES = [0] + [min(num_rank, 10) for num_rank in range(1, 14)]
+# Binomial coefficients for picking up to 4 cards of the same rank
+BINOMIALS = [[1], [1, 1], [1, 2, 1], [1, 3, 3, 1], [1, 4, 6, 4, 1]]
+
+
+# Get the Card for a card int
+def index_card(index):
+    return DECK[index]
+
+
+# Build a 52-bit mask out of any iterable of Cards
+def hand_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
+
+# Convert a mask back to a list of Cards, lowest rank first
+def mask_cards(mask):
+    return [index_card(index) for index in range(52) if mask >> index & 1]
+
+
+# Get a 14-slot rank histogram (index 0 unused) of all the cards in a mask
+def rank_histogram(mask):
+    return [0] + [NIBBLE_COUNTS[(mask >> shift) & 0xF] for shift in range(0, 52, 4)]
+
+
+# Number of distinct combinations of 2 to max_size cards whose values add up to 15
+# Each card extends the list of running totals reachable so far, and totals over 15 are dropped right away
+def count_15s_histogram(histogram, max_size=5):
+    if sum(histogram) <= max_size:
+        totals = [0]
+        for num_rank in range(1, 14):
+            value = RANK_VALUES[num_rank]
+            for _ in range(histogram[num_rank]):
+                totals += [total + value for total in totals if total + value <= 15]
+        return totals.count(15)
+    # With more cards than a combination can hold (long pegging sequences), the size of each total matters too
+    totals = [(0, 0)]
+    for num_rank in range(1, 14):
+        value = RANK_VALUES[num_rank]
+        for _ in range(histogram[num_rank]):
+            totals += [(total + value, size + 1) for total, size in totals if total + value <= 15 and size < max_size]
+    return sum(1 for total, size in totals if total == 15)
+
+
+# 2 points for each pair, which works out to 2, 6, or 12 for a pair, pair royal, or pair double royal
+def count_pairs_histogram(histogram):
+    return sum(num_cards * (num_cards - 1) for num_cards in histogram)
+
+
+# Every maximal stretch of 3 or more consecutive ranks is a run, counted once for each way of picking its cards
+def count_runs_histogram(histogram):
+    points = 0
+    run_length = 0
+    run_ways = 1
+    for num_rank in range(1, 15):
+        num_cards = histogram[num_rank] if num_rank < 14 else 0
+        if num_cards > 0:
+            run_length += 1
+            run_ways *= num_cards
+        else:
+            if run_length >= 3:
+                points += run_length * run_ways
+            run_length = 0
+            run_ways = 1
+    return points
+
+
+# Points for a flush, following the same rules as Hand.count_flush
+def count_flush_mask(mask, upcard=-1, is_crib=False):
+    if mask == 0:
+        return 0
+    for suit_mask in SUIT_MASKS.values():
+        if mask & ~suit_mask == 0:
+            # Without an upcard, a flush is one point per card, so four cards on their own are only worth 4
+            if upcard < 0:
+                num_cards = bin(mask).count('1')
+                return num_cards if num_cards == 5 or num_cards == 4 and not is_crib else 0
+            # Five card flush if the upcard also matches
+            if suit_mask >> upcard & 1:
+                return 5
+            # Four card flushes can't include the upcard and can't be scored in a crib
+            elif not is_crib:
+                return 4
+            return 0
+    return 0
+
+
+# 1 point for a jack in the hand of the same suit as the upcard
+def count_nibs_mask(mask, upcard=-1):
+    if upcard < 0:
+        return 0
+    return 1 if mask & JACK_BITS[Card.SUITS[upcard % 4]] else 0
+
+
+# Score the cards in mask plus an optional upcard (given as a card int, -1 if not set)
+# This computes the same total as counting every Score from Hand.count, without building any of them
+def count_mask(mask, upcard=-1, is_crib=False, pegging=False):
+    all_mask = mask | (1 << upcard) if upcard >= 0 else mask
+    histogram = rank_histogram(all_mask)
+    points = 2 * count_15s_histogram(histogram) + count_pairs_histogram(histogram) + count_runs_histogram(histogram)
+    # Don't count flushes or nibs if pegging, but do check for 31
+    if pegging:
+        if sum(num_rank * NIBBLE_COUNTS[(mask >> ((num_rank - 1) * 4)) & 0xF] for num_rank in range(1, 14)) == 31:
+            points += 2
+    else:
+        points += count_flush_mask(mask, upcard, is_crib) + count_nibs_mask(mask, upcard)
+    return points
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+from card import Card, DECK
+from score_table import count_upcards
+from itertools import combinations
+from multiprocessing import Pool
+from array import array
+from os import path
+import sys
+import time
+
+
+# Exact expected crib points for every discard, suits included
+# For a two-card discard, every pair the opponent could throw is combined with every upcard left in the deck. For a
+# one-card discard (three-player games), every set of three other crib cards is. Flush and nibs potential depends on
+# whether the two discards are suited, so pairs are keyed by both ranks plus a suited flag.
+# The table is generated offline by running this module and loaded once when it's imported
+
+TABLE_FILE = path.join(path.dirname(path.abspath(__file__)), 'crib_table.bin')
+MAGIC = b'DSCT'
+VERSION = 1
+# 13 x 13 ranks x suited/offsuit for pairs, followed by 13 single cards
+NUM_PAIR_ENTRIES = 13 * 13 * 2
+NUM_ENTRIES = NUM_PAIR_ENTRIES + 13
+
+
+def pair_index(num_rank, other_num_rank, suited):
+    return ((num_rank - 1) * 13 + other_num_rank - 1) * 2 + suited
+
+
+def single_index(num_rank):
+    return NUM_PAIR_ENTRIES + num_rank - 1
+
+
+# Representative cards for a table entry. Suits are interchangeable, so clubs (and spades for offsuit) stand in for all
+def entry_discards(entry):
+    if entry >= NUM_PAIR_ENTRIES:
+        return [Card(entry - NUM_PAIR_ENTRIES + 1, 'c')]
+    num_rank, rest = divmod(entry, 26)
+    other_num_rank, suited = divmod(rest, 2)
+    return [Card(num_rank + 1, 'c'), Card(other_num_rank + 1, 'c' if suited else 's')]
+
+
+# Average crib score over every way the rest of the crib and the upcard can fall around the given discards
+def expected_crib(discards):
+    remaining = [card for card in DECK if card not in discards]
+    total = 0
+    num_cribs = 0
+    for others in combinations(remaining, 4 - len(discards)):
+        crib = discards + list(others)
+        upcards = [card for card in remaining if card not in others]
+        total += sum(count_upcards(crib, upcards, is_crib=True))
+        num_cribs += len(upcards)
+    return total / num_cribs
+
+
+# Entries that exist: a pair of the same rank can't be suited
+def valid_entries():
+    for entry in range(NUM_ENTRIES):
+        discards = entry_discards(entry)
+        if len(discards) == 2 and discards[0].num_rank > discards[1].num_rank:
+            continue
+        if len(discards) == 2 and discards[0] is discards[1]:
+            continue
+        yield entry
+
+
+def solve_entry(entry):
+    return entry, expected_crib(entry_discards(entry))
+
+
+# Generate the whole table, spreading the entries over a process per core (or solving them in this process if jobs is 1)
+def build_table(jobs=None):
+    table = array('f', [0.0] * NUM_ENTRIES)
+    if jobs == 1:
+        results = map(solve_entry, valid_entries())
+    else:
+        pool = Pool(jobs)
+        results = pool.imap_unordered(solve_entry, list(valid_entries()))
+    for entry, points in results:
+        table[entry] = points
+        # Pairs are symmetric, so fill in the swapped order too
+        if entry < NUM_PAIR_ENTRIES:
+            discards = entry_discards(entry)
+            table[pair_index(discards[1].num_rank, discards[0].num_rank, entry % 2)] = points
+    if jobs != 1:
+        pool.close()
+        pool.join()
+    return table
+
+
+def save_table(table, file_name=TABLE_FILE):
+    data = array('f', table)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    with open(file_name, 'wb') as table_file:
+        table_file.write(MAGIC + bytes([VERSION]))
+        data.tofile(table_file)
+
+
+# Load the table from disk, or return None if it's missing or from a different version
+def load_table(file_name=TABLE_FILE):
+    try:
+        with open(file_name, 'rb') as table_file:
+            if table_file.read(5) != MAGIC + bytes([VERSION]):
+                return None
+            table = array('f')
+            table.fromfile(table_file, NUM_ENTRIES)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == 'big':
+        table.byteswap()
+    return table
+
+
+# Get the table, generating it in this process if the file is missing or out of date
+def get_table():
+    global CRIB_TABLE
+    if CRIB_TABLE is None:
+        CRIB_TABLE = build_table(jobs=1)
+    return CRIB_TABLE
+
+
+# Expected crib points for a list of one or two discards
+def crib_points(discards):
+    table = get_table()
+    if len(discards) == 2:
+        return table[pair_index(discards[0].num_rank, discards[1].num_rank, discards[0].suit == discards[1].suit)]
+    return table[single_index(discards[0].num_rank)]
+
+
+CRIB_TABLE = load_table()
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    save_table(build_table(int(sys.argv[1]) if len(sys.argv) > 1 else None))
+    print('Wrote ' + TABLE_FILE + ' in ' + str(round(time.perf_counter() - start, 1)) + ' seconds.')
@@ -0,0 +1,47 @@
+# Decisions a game needs made before it can go on
+# Game.steps yields one of these whenever it's waiting on someone, and is resumed by sending it the answer. Each request
+# knows how to ask a Player object for its answer, which is how Game.play drives a game, but anything that can answer
+# them (a server waiting on a remote player, or a batch of AIs answering many games at once) can drive a game instead
+
+
+# Cut the deck for the player with the given number. The answer is how many cards down to cut, from 4 to 32
+class CutRequest:
+    def __init__(self, player_num):
+        self.player_num = player_num
+
+    def ask(self, player, set_message):
+        return player.cut_deck(set_message)
+
+
+# Discard to the crib. The answer is the list of cards discarded from the player's hand
+# opponent is what the player calls the dealer when it's someone else's crib
+class DiscardRequest:
+    def __init__(self, player_num, dealer, opponent_score, num_cards=2, opponent='Opponent'):
+        self.player_num = player_num
+        self.dealer = dealer
+        self.opponent_score = opponent_score
+        self.num_cards = num_cards
+        self.opponent = opponent
+
+    def ask(self, player, set_message):
+        return player.select_discards(set_message, self.dealer, self.opponent_score, self.num_cards, self.opponent)
+
+
+# Make a pegging play from the cards the player has left. The answer is the numerical rank of the card to play, or -1
+# for a go. played_cards is every round of pegging so far, with the current round last
+class PegPlayRequest:
+    def __init__(self, player_num, available_cards, pegging_count, opponent_go, played_cards):
+        self.player_num = player_num
+        self.available_cards = available_cards
+        self.pegging_count = pegging_count
+        self.opponent_go = opponent_go
+        self.played_cards = played_cards
+
+    def ask(self, player, set_message):
+        return player.get_peg_play(set_message, self.available_cards, self.pegging_count, self.opponent_go,
+                                   self.played_cards)
+
+
+# Wait for whoever is watching to read what just happened. Any answer will do
+class AcknowledgeRequest:
+    player_num = None
@@ -1,35 +1,81 @@
-from card import Card
+from card import Card, DECK
+from cardmask import FULL_MASK, hand_mask, mask_cards, rank_histogram
 from typing import Dict, List
 import random
 
 
+# The deck is a permutation of the 52 cards with a moving index marking the top of the deck, along with a 52-bit mask
+# of the cards that haven't been dealt yet. Dealing just advances the index
+# Shuffles come from the given random.Random, so a game that owns one can be replayed from its seed
 class Deck:
-    def __init__(self):
-        self.cards = []
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.order = []
+        self.position = 0
+        self.mask = 0
         self.reset()
 
     # Instantiate a standard 52-card deck
     def reset(self):
-        self.cards = []
-        for num_rank in range(1, 14):
-            for suit in ['c', 's', 'h', 'd']:
-                card = Card(num_rank, suit)
-                self.cards.append(card)
+        self.order = list(DECK)
+        self.position = 0
+        self.mask = FULL_MASK
 
-    # Shuffle the deck
+    # The cards that haven't been dealt yet, from the top of the deck down
+    @property
+    def cards(self) -> List[Card]:
+        return self.order[self.position:]
+
+    # Shuffle the cards that haven't been dealt yet
     def shuffle(self):
-        random.shuffle(self.cards)
+        remaining = self.order[self.position:]
+        self.rng.shuffle(remaining)
+        self.order[self.position:] = remaining
+
+    # Take the next num_cards cards off the top of the deck
+    def take(self, num_cards):
+        cards = self.order[self.position:self.position + num_cards]
+        self.position += num_cards
+        self.mask &= ~hand_mask(cards)
+        return cards
 
     # Deal two 6-card hands or three 5-card hands
     def deal_hands(self, num_players):
         if num_players == 2:
-            hands = [self.cards[:12:2], self.cards[1:13:2]]
-            self.cards = self.cards[12:]
+            cards = self.take(12)
+            hands = [cards[::2], cards[1::2]]
         elif num_players == 3:
-            hands = [self.cards[:13:3], self.cards[1:14:3], self.cards[2:15:3]]
-            self.cards = self.cards[15:]
+            cards = self.take(15)
+            hands = [cards[::3], cards[1::3], cards[2::3]]
         return hands
 
     # Deal one card (for three-player cribs)
     def deal_card(self):
-        return self.cards.pop(0)
+        return self.take(1)[0]
+
+    # Look at the card a given number of cards down from the top without dealing it
+    def peek(self, depth):
+        return self.order[self.position + depth]
+
+    # Cut the deck at a given depth and remove the card found there
+    # The cut card is swapped to the top before it's dealt, which only changes the order of the cards below the cut
+    def cut(self, depth):
+        cut_index = self.position + depth
+        self.order[self.position], self.order[cut_index] = self.order[cut_index], self.order[self.position]
+        return self.deal_card()
+
+    # Mask of every card that isn't among the given known cards
+    @staticmethod
+    def unseen_mask(known_cards) -> int:
+        return FULL_MASK & ~hand_mask(known_cards)
+
+    # Every card that isn't among the given known cards, lowest rank first
+    @staticmethod
+    def unseen_cards(known_cards) -> List[Card]:
+        return mask_cards(Deck.unseen_mask(known_cards))
+
+    # Number of cards of each numerical rank that aren't among the given known cards
+    @staticmethod
+    def unseen_rank_histogram(known_cards) -> Dict[int, int]:
+        histogram = rank_histogram(Deck.unseen_mask(known_cards))
+        return {num_rank: histogram[num_rank] for num_rank in range(1, 14)}
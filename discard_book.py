@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+from card import Card
+from deck import Deck
+from hand import Hand
+from analysis import evaluate_keep
+from canonical import canonicalize, canonical_order, key_cards, all_keys
+from crib_table import crib_points, get_table
+from itertools import combinations
+from multiprocessing import Pool
+from array import array
+from bisect import bisect_left
+from os import path
+import mmap
+import struct
+import sys
+import time
+import zlib
+
+
+# Precomputed optimal-discard book
+# Every canonical 6-card hand (two-player games) and 5-card hand (three-player games) is solved offline with the same
+# logic as AIPlayer.get_best_discards, and the stats for each keep are written to a file along with the keep rankings
+# for the dealer and the pone. At runtime the file is memory-mapped read-only, so every process shares the same pages,
+# and looking up a hand is a canonicalization plus a binary search.
+#
+# File layout (native byte order):
+#   header: magic, version, byte order, crib table checksum, number of 6-card hands, number of 5-card hands
+#   then for each hand size: sorted canonical keys (uint64), followed by one fixed-size record per key
+#   record: for each keep, avg, crib points, max, min, and standard deviation (float32), then the dealer ranking and
+#   the pone ranking (one byte per keep, as an index into combinations(canonical cards, 4))
+
+BOOK_FILE = path.join(path.dirname(path.abspath(__file__)), 'discard_book.bin')
+MAGIC = b'DSDB'
+VERSION = 1
+HEADER = struct.Struct('=4sBcIII')
+HAND_SIZES = (6, 5)
+NUM_STATS = 5
+
+
+# Checksum of the crib table the book was built against. A book built against a different table is stale
+def crib_checksum():
+    return zlib.crc32(get_table().tobytes())
+
+
+def num_keeps(num_cards):
+    return len(list(combinations(range(num_cards), 4)))
+
+
+def record_struct(num_cards):
+    keeps = num_keeps(num_cards)
+    return struct.Struct('=' + 'f' * keeps * NUM_STATS + 'B' * keeps * 2)
+
+
+# Solve one canonical hand. Returns the packed record for it
+def solve_hand(key):
+    cards = key_cards(key)
+    upcards = Deck.unseen_cards(cards)
+    stats = []
+    for keep in combinations(cards, 4):
+        hand_info = evaluate_keep(keep, upcards)
+        discard = [card for card in cards if card not in keep]
+        stats.append((hand_info['avg'], crib_points(discard), hand_info['max'][0][1], hand_info['min'][0][1],
+                      hand_info['std_dev']))
+    dealer_order = sorted(range(len(stats)), key=lambda i: stats[i][0] + stats[i][1], reverse=True)
+    pone_order = sorted(range(len(stats)), key=lambda i: stats[i][0] - stats[i][1], reverse=True)
+    values = [value for keep_stats in stats for value in keep_stats]
+    return record_struct(len(cards)).pack(*values, *dealer_order, *pone_order)
+
+
+# Build the whole book, spreading the hands over a process per core
+def build_book(file_name=BOOK_FILE, jobs=None):
+    keys = {num_cards: all_keys(num_cards) for num_cards in HAND_SIZES}
+    with open(file_name, 'wb') as book_file, Pool(jobs) as pool:
+        book_file.write(HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(), crib_checksum(),
+                                    len(keys[6]), len(keys[5])))
+        for num_cards in HAND_SIZES:
+            array('Q', keys[num_cards]).tofile(book_file)
+            for record in pool.imap(solve_hand, keys[num_cards], chunksize=256):
+                book_file.write(record)
+
+
+class DiscardBook:
+    def __init__(self, book_file, book_map, sections):
+        self.book_file = book_file
+        self.book_map = book_map
+        # For each hand size: (keys as a memoryview of uint64, offset of the first record, record struct)
+        self.sections = sections
+
+    # Open the book, or return None if it's missing, stale, or was built on a machine with a different byte order
+    @staticmethod
+    def open(file_name=BOOK_FILE):
+        try:
+            book_file = open(file_name, 'rb')
+        except OSError:
+            return None
+        try:
+            book_map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, byte_order, checksum, num_six, num_five = HEADER.unpack_from(book_map)
+        except (ValueError, OSError, struct.error):
+            book_file.close()
+            return None
+        if magic != MAGIC or version != VERSION or byte_order != sys.byteorder[0].encode() or \
+                checksum != crib_checksum():
+            book_map.close()
+            book_file.close()
+            return None
+        # Check the size before taking any views of the map, since it can't be closed while they exist
+        size = HEADER.size + sum(num_hands * (8 + record_struct(num_cards).size)
+                                 for num_cards, num_hands in zip(HAND_SIZES, (num_six, num_five)))
+        if size != len(book_map):
+            book_map.close()
+            book_file.close()
+            return None
+        sections = {}
+        offset = HEADER.size
+        for num_cards, num_hands in zip(HAND_SIZES, (num_six, num_five)):
+            record = record_struct(num_cards)
+            keys = memoryview(book_map)[offset:offset + num_hands * 8].cast('Q')
+            sections[num_cards] = (keys, offset + num_hands * 8, record)
+            offset += num_hands * (8 + record.size)
+        return DiscardBook(book_file, book_map, sections)
+
+    # Look up a 5 or 6-card hand. Returns the same list of hand info dicts as AIPlayer.get_best_discards, or None if
+    # the hand isn't in the book. The book doesn't record which upcards reach the max and min, so those are blank cards
+    def lookup(self, cards, dealer):
+        if len(cards) not in self.sections:
+            return None
+        keys, records_offset, record = self.sections[len(cards)]
+        key, permutation = canonicalize(cards)
+        position = bisect_left(keys, key)
+        if position == len(keys) or keys[position] != key:
+            return None
+        values = record.unpack_from(self.book_map, records_offset + position * record.size)
+        keeps = list(combinations(canonical_order(cards, permutation), 4))
+        num_stats = len(keeps) * NUM_STATS
+        if dealer:
+            order = values[num_stats:num_stats + len(keeps)]
+        else:
+            order = values[num_stats + len(keeps):]
+        all_hands = []
+        for keep_index in order:
+            avg, crib, max_count, min_count, std_dev = values[keep_index * NUM_STATS:(keep_index + 1) * NUM_STATS]
+            keep = keeps[keep_index]
+            all_hands.append({'hand': Hand(list(keep)),
+                              'discard': [card for card in cards if card not in keep],
+                              'avg': avg,
+                              'crib_points': crib,
+                              'net_points': avg + crib if dealer else avg - crib,
+                              'max': [(Card(), int(max_count))],
+                              'min': [(Card(), int(min_count))],
+                              'std_dev': std_dev})
+        return all_hands
+
+
+BOOK = DiscardBook.open()
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    build_book(jobs=int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print('Wrote ' + BOOK_FILE + ' in ' + str(round(time.perf_counter() - start, 1)) + ' seconds.')
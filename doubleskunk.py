@@ -2,9 +2,10 @@
 import sys
 import argparse
 from game import Game
+from simulate import run_tournament, parse_matchup, verify_replay
 from pyfiglet import Figlet
 from colorama import Style, Back, Fore
-from os import name, system
+from os import name, system, cpu_count
 
 
 def print_welcome():
@@ -19,6 +20,14 @@ def print_welcome():
     print(Style.BRIGHT + Fore.LIGHTGREEN_EX + '\n' + '-' * 80 + '\n' + Style.RESET_ALL)
     print(Style.BRIGHT + 'Please maximize your terminal window for the best experience.\n' + Style.RESET_ALL)
 
+# Number of discard analysis workers, which can't be negative
+def worker_count(text):
+    workers = int(text)
+    if workers < 0:
+        raise argparse.ArgumentTypeError('the number of workers can\'t be negative')
+    return workers
+
+
 # noinspection PyBroadException
 def main():
     # Check for command-line arguments
@@ -29,10 +38,48 @@ def main():
                         choices=range(2, 4), metavar='2-3', help='Set number of players')
     parser.add_argument('-D', '--debug', action='store_true',
                         help='Run in debug mode')
+    parser.add_argument('-w', '--workers', nargs='?', default=0, const=cpu_count(), type=worker_count, metavar='N',
+                        help='Analyze AI discards in a pool of N worker processes, or one per core if N is left out '
+                             '(default: no pool)')
+    parser.add_argument('-t', '--time', nargs='?', default=None, type=float, metavar='SECONDS',
+                        help='Give the AI at most SECONDS to make each decision (default: no limit)')
+    parser.add_argument('--simulate', type=int, metavar='N',
+                        help='Play N AI-vs-AI games of each matchup with no one watching, and print the results')
+    parser.add_argument('--matchups', nargs='+', type=parse_matchup, metavar='AvB',
+                        help='Difficulties to pit against each other when simulating, like 1v3 or 1v2v3 '
+                             '(default: 1v2 1v3 2v3)')
+    parser.add_argument('--jobs', type=int, metavar='K',
+                        help='Spread simulated games over K processes (default: one per core)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Master seed for simulated games (default: 0)')
+    parser.add_argument('--batch', type=int, default=1, metavar='B',
+                        help='Play simulated games B at a time, with their AI decisions made in batches (default: 1)')
+    parser.add_argument('--deterministic', action='store_true',
+                        help='Have simulated AIs do fixed amounts of work instead of using time budgets, so every '
+                             'game repeats exactly from its seed (ignores --time)')
+    parser.add_argument('--verify-replay', nargs='?', const=0, type=int, metavar='SEED',
+                        help='Play a seeded game with a deterministic hard AI twice and check that it replays the same')
     parser.add_argument('--test', action='store_true',
                         help='Jump straight to current test')
     args = parser.parse_args(sys.argv[1:])
 
+    # Run a self-play tournament instead of a game
+    if args.simulate is not None:
+        for matchup_stats in run_tournament(args.simulate, args.matchups, args.jobs, args.seed, args.time,
+                                            args.batch, args.deterministic):
+            print(matchup_stats.report())
+        return
+
+    if args.verify_replay is not None:
+        mismatch = verify_replay(args.verify_replay)
+        if mismatch is None:
+            print('Game ' + str(args.verify_replay) + ' replayed the same.')
+        else:
+            print('Game ' + str(args.verify_replay) + ' replayed differently from decision ' + str(mismatch[0]) +
+                  ': ' + str(mismatch[1]) + ' then ' + str(mismatch[2]))
+            sys.exit(1)
+        return
+
     print_welcome()
 
     # Set number of players
@@ -66,7 +113,7 @@ def main():
     except Exception:
         difficulty = 2
 
-    game = Game(num_players, difficulty, args.debug)
+    game = Game(num_players, difficulty, args.debug, args.workers, args.time)
     game.play()
 
 
@@ -1,391 +1,77 @@
 from card import Card
 from deck import Deck
 from hand import Hand
+from pegging_state import PeggingState
 from player import HumanPlayer, AIPlayer
 from message import Message
-from colorama import Fore, Back, Style, init
-from os import system, name
-from typing import List
+from renderer import TerminalRenderer
+from decisions import CutRequest, DiscardRequest, PegPlayRequest, AcknowledgeRequest
+from colorama import Style
 from collections import deque
 import copy
-import itertools
+import random
+
+
+# Raised by the victory callback to stop the game wherever it is
+class GameOver(Exception):
+    pass
+
+
+# Outcome of a finished game
+# skunk is 0 for a regular win, or 1, 2, or 3 for a skunk, double skunk, or triple skunk
+class GameResult:
+    def __init__(self, winner, scores, skunk, hands_played):
+        self.winner = winner
+        self.scores = scores
+        self.skunk = skunk
+        self.hands_played = hands_played
 
 
 # noinspection PyBroadException
 class Game:
-    BOARD_SPACE = Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' '
-
-    def __init__(self, num_players=2, difficulty=3, debug=False):
-        # Initialize colorama to enable styled terminal output on Windows
-        init()
-        # One AI for a 2-player game and two AIs for a 3-player game
+    # decision_time caps the seconds each AI decision can take (None for no limit)
+    # difficulty can also be a list with one difficulty per AI player, and with human set to False, player 1 is an AI too
+    # The renderer draws the game and waits on the player; a NullRenderer runs it with no one watching
+    # The deck and every player draw from the game's own random.Random, so a game with a seed plays out the same way again
+    # as long as its AIs are deterministic, doing fixed amounts of work with caches of their own (decision_time is
+    # ignored then). Otherwise a hard AI's decisions depend on how much analysis fits in its time budgets
+    def __init__(self, num_players=2, difficulty=3, debug=False, workers=0, decision_time=None, renderer=None,
+                 human=True, seed=None, deterministic=False):
+        self.rng = random.Random(seed)
+        if renderer is None:
+            renderer = TerminalRenderer(debug)
+        self.renderer = renderer
+        num_ai_players = num_players - 1 if human else num_players
+        if isinstance(difficulty, int):
+            difficulty = [difficulty] * num_ai_players
+        # One AI for a 2-player game and two AIs for a 3-player game, plus player 1 if they're not human
         self.players = []
-        self.players.append(HumanPlayer(self.player_victory, 0))
-        self.players.append(
-            AIPlayer(self.player_victory, 1, difficulty=difficulty, verbose=debug))
-        if num_players == 3:
+        if human:
+            self.players.append(HumanPlayer(self.player_victory, 0, self.rng))
+        for ai_difficulty in difficulty:
             self.players.append(
-                AIPlayer(self.player_victory, 2, difficulty=difficulty, verbose=debug))
+                AIPlayer(self.player_victory, len(self.players), difficulty=ai_difficulty, verbose=debug,
+                         workers=workers, num_players=num_players, decision_time=decision_time, rng=self.rng,
+                         deterministic=deterministic))
         self.difficulty = difficulty
         self.messages = [Message()]
         self.debug = debug
-        self.deck = Deck()
+        self.deck = Deck(self.rng)
         self.crib = Hand()
         self.upcard = Card()
         self.pegging_cards = []
         self.pegging_count = -1
         # List representing the dealer and the player(s) next up
         self.dealer = list(range(num_players))
-
-    # Clear the screen with the appropriate terminal command for the system
-    def clear(self):
-        # Don't clear the screen in debug mode. This helps with debugging because it enables scrollback to see snapshots of game state change
-        if not self.debug:
-            if name == 'nt':
-                system('cls')
-            else:
-                system('clear')
-
-    # Render the top of a score section
-    @staticmethod
-    def render_board_top(starting_point=1) -> List[str]:
-        render_str = Style.BRIGHT + Back.LIGHTYELLOW_EX + \
-            Style.DIM + Fore.BLACK + '  ╓─────╖ '
-        for i in range(60):
-            if i == 0:
-                render_str += '╓'
-            elif i == 59:
-                render_str += '─────╖  '
-            elif i % 5 == 0:
-                render_str += '───╥'
-            else:
-                render_str += '──'
-        render_str += Style.RESET_ALL
-        return render_str
-
-    # Render the bottom of a score section
-    @staticmethod
-    def render_board_bottom(starting_point=1) -> List[str]:
-        render_str = Style.BRIGHT + Back.LIGHTYELLOW_EX + \
-            Style.DIM + Fore.BLACK + '  ╙─────╜ '
-        for i in range(60):
-            if i == 0:
-                render_str += '╙'
-            elif i == 59:
-                render_str += '─────╜  '
-            elif i % 5 == 0:
-                render_str += '───╨'
-            else:
-                render_str += '──'
-        render_str += Style.RESET_ALL
-        return render_str
-
-    # Render a hole with or without a peg for a given score number and player
-    def render_board_hole(self, score, player=None):
-        # Hole 121 needs special handling since any player's peg can go there
-        if score == 121:
-            if any(player.peg_at(121) for player in self.players):
-                return Style.RESET_ALL + Style.DIM + \
-                    Back.LIGHTYELLOW_EX + Style.BRIGHT + Fore.BLACK + ' ●'
-            else:
-                return Style.RESET_ALL + Style.DIM + Back.LIGHTYELLOW_EX + Style.BRIGHT + Fore.BLACK + ' ○'
-        # Proper background colors for all players
-        if player == self.players[0]:
-            render_str = Style.RESET_ALL + Style.DIM + \
-                Back.LIGHTRED_EX + Style.BRIGHT + Fore.BLACK
-        elif player == self.players[1]:
-            render_str = Style.RESET_ALL + Style.DIM + \
-                Back.LIGHTGREEN_EX + Style.BRIGHT + Fore.BLACK
-        elif player == self.players[2]:
-            render_str = Style.RESET_ALL + Style.DIM + \
-                Back.LIGHTBLUE_EX + Style.BRIGHT + Fore.BLACK
-        else:
-            render_str = Style.RESET_ALL + Style.DIM + Back.LIGHTYELLOW_EX
-        # Different unicode characters for if a peg is in the hole or not
-        if player.peg_at(score):
-            render_str += ' ●'
-        else:
-            render_str += ' ○'
-        return render_str
-
-    # Render the score section of the board
-    def render_board_score(self, starting_point=1):
-        # Vertical separator character constant
-        VERT = Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + '║'
-        # Separate strings for each line of the score
-        if len(self.players) == 2:
-            render_strs = [self.BOARD_SPACE * 2,
-                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2]
-        else:
-            render_strs = [self.BOARD_SPACE * 2,
-                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2,
-                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2]
-
-        # Render holes -1 through 60
-        if starting_point == 1:
-            # Render the starting line
-            render_strs[0] += VERT
-            render_strs[1] += Style.BRIGHT + \
-                Back.LIGHTYELLOW_EX + Fore.BLACK + '╠═════╣ '
-            render_strs[2] += VERT
-            if len(self.players) == 3:
-                render_strs[3] += Style.BRIGHT + \
-                    Back.LIGHTYELLOW_EX + Fore.BLACK + '╠═════╣ '
-                render_strs[4] += VERT
-            for i in [-1, 0]:
-                render_strs[0] += self.render_board_hole(i, self.players[0])
-                render_strs[2] += self.render_board_hole(i, self.players[1])
-                if len(self.players) == 3:
-                    render_strs[4] += self.render_board_hole(i, self.players[2])
-            render_strs[0] += ' ' + VERT + self.BOARD_SPACE
-            render_strs[2] += ' ' + VERT + self.BOARD_SPACE
-            if len(self.players) == 3:
-                render_strs[4] += ' ' + VERT + self.BOARD_SPACE
-            # Render the scores
-            for i in range(1, 61):
-                # Left side
-                if i == 1:
-                    render_strs[0] += '║'
-                    render_strs[1] += '╠'
-                    render_strs[2] += '║'
-                    if len(self.players) == 3:
-                        render_strs[3] += '╠'
-                        render_strs[4] += '║'
-                render_strs[0] += self.render_board_hole(i, self.players[0])
-                render_strs[1] += '══'
-                render_strs[2] += self.render_board_hole(i, self.players[1])
-                if len(self.players) == 3:
-                    render_strs[3] += '══'
-                    render_strs[4] += self.render_board_hole(i, self.players[2])
-                # Right side
-                if i == 60:
-                    render_strs[0] += ' ' + VERT + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    render_strs[1] += '═╣' + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    render_strs[2] += ' ' + VERT + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    if len(self.players) == 3:
-                        render_strs[3] += '═╣' + self.BOARD_SPACE + \
-                            self.BOARD_SPACE + Style.RESET_ALL
-                        render_strs[4] += ' ' + VERT + self.BOARD_SPACE + \
-                            self.BOARD_SPACE + Style.RESET_ALL
-                # Separators
-                elif i % 5 == 0:
-                    render_strs[0] += ' ' + VERT
-                    render_strs[1] += '═╬'
-                    render_strs[2] += ' ' + VERT
-                    if len(self.players) == 3:
-                        render_strs[3] += '═╬'
-                        render_strs[4] += ' ' + VERT
-
-        # Render holes 61-121
-        else:
-            # Render the finish line
-            if len(self.players) == 2:
-                render_strs[0] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-                render_strs[1] += VERT + self.BOARD_SPACE + \
-                    self.render_board_hole(
-                        121) + self.BOARD_SPACE * 2 + VERT + self.BOARD_SPACE
-                render_strs[2] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-            elif len(self.players) == 3:
-                render_strs[0] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-                render_strs[1] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-                render_strs[2] += VERT + self.BOARD_SPACE + \
-                    self.render_board_hole(
-                        121) + self.BOARD_SPACE * 2 + VERT + self.BOARD_SPACE
-                render_strs[3] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-                render_strs[4] += VERT + self.BOARD_SPACE * \
-                    5 + VERT + self.BOARD_SPACE
-            # Render the scores
-            for i in range(120, 60, -1):
-                # Left side
-                if i == 120:
-                    render_strs[0] += '║'
-                    render_strs[1] += '╠'
-                    render_strs[2] += '║'
-                    if len(self.players) == 3:
-                        render_strs[3] += '╠'
-                        render_strs[4] += '║'
-                render_strs[0] += self.render_board_hole(i, self.players[0])
-                render_strs[1] += '══'
-                render_strs[2] += self.render_board_hole(i, self.players[1])
-                if len(self.players) == 3:
-                    render_strs[3] += '══'
-                    render_strs[4] += self.render_board_hole(i, self.players[2])
-                # Right side
-                if i == 61:
-                    render_strs[0] += ' ' + VERT + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    render_strs[1] += '═╣' + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    render_strs[2] += ' ' + VERT + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                    if len(self.players) == 3:
-                        render_strs[3] += '═╣' + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                        render_strs[4] += ' ' + VERT + self.BOARD_SPACE + \
-                        self.BOARD_SPACE + Style.RESET_ALL
-                # Skunk line
-                elif i == 91:
-                    render_strs[0] += ' ' + VERT
-                    render_strs[1] += '═S'
-                    render_strs[2] += ' ' + VERT
-                    if len(self.players) == 3:
-                        render_strs[3] += '═S'
-                        render_strs[4] += ' ' + VERT
-                # Vertical separators
-                elif (i - 1) % 5 == 0:
-                    render_strs[0] += ' ' + VERT
-                    render_strs[1] += '═╬'
-                    render_strs[2] += ' ' + VERT
-                    if len(self.players) == 3:
-                        render_strs[3] += '═╬'
-                        render_strs[4] += ' ' + VERT
-        return render_strs
-
-    @staticmethod
-    def render_ui_messages(messages, width=80, margin_left=10):
-        render_strs = [' ' * margin_left + '╓' + '─' * width + '╖']
-        for message in messages:
-            render_strs.append(' ' * margin_left + '║ ' +
-                               message.ljust(width) + ' ║')
-        render_strs.append(
-            ' ' * margin_left + '╙' + '─' * width + '╜')
-        return render_strs
-
-    def render_ui_hand(self, render_strs, player, width=25, margin_left=35):
-        padded_hand = Message(str(self.players[player].hand))
-        render_strs[0] += ' ' * margin_left + '╓' + '─' * width + '╖'
-        render_strs[1] += ' ' * margin_left + '║' + \
-            'Your hand'.center(width) + '║'
-        render_strs[2] += ' ' * margin_left + '║' + \
-            padded_hand.center(width) + '║'
-        render_strs[3] += ' ' * margin_left + '╙' + '─' * width + '╜'
-        return render_strs
-
-    def render_ui_upcard(self, render_strs):
-        render_strs[0] += '     ╓────────╖'
-        render_strs[1] += '     ║ Upcard ║'
-        render_strs[2] += '     ║' + \
-            Message(str(self.upcard)).center(8) + '║'
-        render_strs[3] += '     ╙────────╜'
-        return render_strs
-
-    def render_ui_score(self, render_strs, player):
-        if player == 0:
-            player_start = Fore.RED
-        elif player == 1:
-            player_start = Fore.GREEN
-        else:
-            player_start = Fore.BLUE
-        render_strs[0] += '     ╓──────────╖'
-        render_strs[1] += '     ║ ' + player_start + 'P' + \
-            str(player + 1) + ' Score' + Style.RESET_ALL + ' ║'
-        render_strs[2] += '     ║   '
-        if player == self.dealer[0]:
-            render_strs[2] += Back.LIGHTBLACK_EX + Style.BRIGHT
-        render_strs[2] += str(self.players[player].score).center(5) + \
-            Style.RESET_ALL + '  ║'
-        render_strs[3] += '     ╙──────────╜'
-        return render_strs
-
-    def render_ui_pegging(self):
-        # Construct the cards piece of the interface
-        card_strs = []
-        # Generate a separate line for each sequence of pegging cards
-        offset = ''
-        for sequence in self.pegging_cards:
-            card_str = offset + ' '.join(str(card) for card in sequence)
-            card_strs.append(Message(str(card_str)))
-            offset += '   ' * len(sequence)
-        # Make height at least 2
-        for i in range(2 - len(card_strs)):
-            card_strs.append(Message(''))
-        # The messages rendering already makes a nice box around it, so no need to reinvent the wheel here
-        if len(self.players) == 2:
-            card_strs = self.render_ui_messages(card_strs, 27, 27)
-        else:
-            card_strs = self.render_ui_messages(card_strs, 40, 20)
-        # Construct the pegging count
-        count_strs = [Message(' Count:'), Message(
-            '   ' + str(self.pegging_count))]
-        count_strs = self.render_ui_messages(count_strs, 10, 50)
-        # Combine them and return the result
-        render_strs = [card + count for card,
-                       count in itertools.zip_longest(card_strs, count_strs, fillvalue='')]
-        return render_strs
-
-    # Draw the board based on current scores
-    def draw_board(self):
-        print()
-        # Row 1
-        print(Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' ' * 10 +
-              '0                      10                      20                      30                      40       '
-              '               50                      60  ' + Style.RESET_ALL)
-        print(self.render_board_top(1))
-        for score_str in self.render_board_score(1):
-            print(score_str)
-        print(self.render_board_bottom(1))
-
-        # Row 2
-        print(self.render_board_top(61))
-        for score_str in self.render_board_score(61):
-            print(score_str)
-        print(self.render_board_bottom(61))
-        print(Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' ' * 9 +
-              '120                     110                     100                     90                      80     '
-              '                 70                      60  ' + Style.RESET_ALL)
-
-    # Draw the informational UI
-    def draw_ui(self):
-        print()
-        render_strs = ['', '', '', '']
-        if len(self.players) == 2:
-            margin = 35
-        else:
-            margin = 25
-        render_strs = self.render_ui_hand(render_strs, 0, margin_left=margin)
-        render_strs = self.render_ui_upcard(render_strs)
-        for i in range(len(self.players)):
-            render_strs = self.render_ui_score(render_strs, i)
-        for render_str in render_strs:
-            print(render_str)
-        # Print pegging UI if in the pegging phase
-        if self.pegging_count > -1:
-            render_strs = self.render_ui_pegging()
-            for render_str in render_strs:
-                print(render_str)
-        render_strs = self.render_ui_messages(self.messages, 103, 20)
-        for render_str in render_strs:
-            print(render_str)
-
-    # Draw the game interface
-    def draw_game(self):
-        self.clear()
-        self.draw_board()
-        self.draw_ui()
-        if self.debug:
-            print('\n--------------\nDEBUG:')
-            print('WHOLE DECK:')
-            print(Hand(self.deck.cards))
-            print('PLAYER 2 HAND:')
-            print(self.players[1].hand)
-            if len(self.players) == 3:
-                print('PLAYER 3 HAND:')
-                print(self.players[2].hand)
-            print('CRIB:')
-            print(self.crib)
-            print('DEALER:')
-            print(self.dealer)
+        # Hands dealt so far, and the result once someone wins
+        self.hands_played = 0
+        self.result = None
 
     # Can be used directly or passed as a callback to player objects so they can write to the UI
     def set_message(self, *messages, **kwargs):
+        # There's nobody to show messages to with a renderer that doesn't draw them
+        if not self.renderer.shows_messages:
+            return
         # If the append_msg argument is passed, use it
         try:
             if kwargs['append_msg']:
@@ -400,17 +86,17 @@ class Game:
             self.messages.extend(messages_list)
         else:
             self.messages = messages_list
-        self.draw_game()
+        self.renderer.draw(self)
 
     # Have both players cut to determine who deals (low card deals)
+    # Like every phase of the game, this is a generator that yields requests for decisions and returns when it's over
     def get_dealer(self):
         self.set_message(
             'Cut to determine dealer. Low card deals; ace is low.')
         # Keep cutting until we have a winner
         while True:
             self.deck.shuffle()
-            p1_cut = self.deck.cards[self.players[0].cut_deck(
-                self.set_message)]
+            p1_cut = self.deck.peek((yield CutRequest(0)))
             p2_cut = p1_cut
             if len(self.players) == 3:
                 p3_cut = p2_cut
@@ -419,11 +105,9 @@ class Game:
                 p3_cut = Card(13)
             # Make sure they don't accidentally cut the exact same card
             while p2_cut == p1_cut or p2_cut == p3_cut or p3_cut == p1_cut:
-                p2_cut = self.deck.cards[self.players[1].cut_deck(
-                    self.set_message)]
+                p2_cut = self.deck.peek((yield CutRequest(1)))
                 if len(self.players) == 3:
-                    p3_cut = self.deck.cards[self.players[2].cut_deck(
-                        self.set_message)]
+                    p3_cut = self.deck.peek((yield CutRequest(2)))
             cut_message = 'Player 1 cuts ' + \
                 str(p1_cut) + '. Player 2 cuts ' + str(p2_cut) + '.'
             if len(self.players) == 3:
@@ -433,12 +117,12 @@ class Game:
             if p1_cut.num_rank < p2_cut.num_rank and p1_cut.num_rank < p3_cut.num_rank:
                 self.set_message(
                     cut_message, 'Player 1 wins the deal. Press enter to continue.')
-                input()
+                yield from self.acknowledge()
                 return 0
             elif p2_cut.num_rank < p1_cut.num_rank and p2_cut.num_rank < p3_cut.num_rank:
                 self.set_message(
                     cut_message, 'Player 2 wins the deal. Press enter to continue.')
-                input()
+                yield from self.acknowledge()
                 if len(self.players) == 2:
                     return 1
                 else:
@@ -446,7 +130,7 @@ class Game:
             elif p3_cut.num_rank < p1_cut.num_rank and p3_cut.num_rank < p2_cut.num_rank:
                 self.set_message(
                     cut_message, 'Player 3 wins the deal. Press enter to continue.')
-                input()
+                yield from self.acknowledge()
                 return 1
             else:
                 self.set_message(cut_message + ' Cut is tied. Cut again.')
@@ -468,40 +152,44 @@ class Game:
             self.players[self.dealer[i]].hand = Hand(hands[i])
 
     # Get discards from both players to the crib
+    # The discards are taken out of the players' hands here, so whatever answers the requests only has to name them
     def get_discards(self):
         if len(self.players) == 2:
             # Each player discards two cards to the crib in a two-player game
-            self.crib = Hand(self.players[0].select_discards(
-                self.set_message, self.dealer[0] == 0, self.players[1].score), is_crib=True)
-            self.crib.cards.extend(self.players[1].select_discards(
-                self.set_message, self.dealer[0] == 1, self.players[0].score))
+            requests = [DiscardRequest(0, self.dealer[0] == 0, self.players[1].score),
+                        DiscardRequest(1, self.dealer[0] == 1, self.players[0].score)]
         else:
             # Each player discards one card to the crib and one is dealt from the deck in a three-player game
-            self.crib = Hand(self.players[0].select_discards(
-                self.set_message, self.dealer[0] == 0, self.players[1].score, 1, "Player " + str(self.dealer[0] + 1)), is_crib=True)
-            self.crib.cards.extend(self.players[1].select_discards(
-                self.set_message, self.dealer[0] == 1, max(self.players[0].score, self.players[2].score)))
-            self.crib.cards.extend(self.players[2].select_discards(
-                self.set_message, self.dealer[0] == 2, max(self.players[0].score, self.players[1].score)))
+            requests = [DiscardRequest(0, self.dealer[0] == 0, self.players[1].score, 1,
+                                       'Player ' + str(self.dealer[0] + 1)),
+                        DiscardRequest(1, self.dealer[0] == 1, max(self.players[0].score, self.players[2].score), 1),
+                        DiscardRequest(2, self.dealer[0] == 2, max(self.players[0].score, self.players[1].score), 1)]
+        self.crib = Hand(is_crib=True)
+        for request in requests:
+            discards = yield request
+            player = self.players[request.player_num]
+            player.hand.cards = [card for card in player.hand.cards if card not in discards]
+            self.crib.cards.extend(discards)
+        if len(self.players) == 3:
             self.crib.cards.extend([self.deck.deal_card()])
-        self.draw_game()
+        self.renderer.draw(self)
 
     # Cut the deck to get the upcard
     def get_upcard(self):
         self.set_message('Cut the deck to determine shared cut card.')
-        self.upcard = self.deck.cards.pop(
-            self.players[self.dealer[1]].cut_deck(self.set_message))
-        self.set_message('Player ' + str(self.dealer[1] + 1) + ' cuts ' +
-                         str(self.upcard) + '. Press enter to continue.')
+        self.upcard = self.deck.cut((yield CutRequest(self.dealer[1])))
+        if self.renderer.shows_messages:
+            self.set_message('Player ' + str(self.dealer[1] + 1) + ' cuts ' +
+                             str(self.upcard) + '. Press enter to continue.')
         if self.upcard.rank == 'J':
             self.players[self.dealer[0]].add_points(2)
             self.set_message('Player ' + str(self.dealer[0] + 1) +
                              ' scores 2 points for heels.', append_msg=True)
-        input()
+        yield from self.acknowledge()
         self.players[0].hand.upcard = self.players[1].hand.upcard = self.crib.upcard = self.upcard
         if len(self.players) == 3:
             self.players[2].hand.upcard = self.upcard
-        self.draw_game()
+        self.renderer.draw(self)
 
     # Do pegging phase until all cards are gone
     def pegging(self):
@@ -519,16 +207,19 @@ class Game:
             go = [False, False, False]
         # Update the rounds counter and add another list for the pegging UI
         rounds_played = 0
+        # Count, pairs, and runs for the current round
+        pegging_state = PeggingState()
+        # Without anyone watching, the messages about each play aren't worth building
+        watching = self.renderer.shows_messages
 
         # Keep pegging as long as at least 1 player has cards
-        while any([len(hand.cards) > 0 for hand in pegging_hands]):
+        while any(hand.cards for hand in pegging_hands):
             # Make sure the current player hasn't said go already and that they have cards
             if not go[player_up] and len(pegging_hands[player_up].cards) > 0:
                 # Get pegging input from either a human or AI player
-                # Passing it the set_message callback, available cards, the pegging count, the 'go' status of the opponent, and cards played so far
-                peg_input = self.players[player_up].get_peg_play(
-                    self.set_message, pegging_hands[player_up], self.pegging_count, go[1 - player_up], self.pegging_cards)
-                print(peg_input)
+                # Passing it the available cards, the pegging count, the 'go' status of the opponent, and cards played so far
+                peg_input = yield PegPlayRequest(player_up, pegging_hands[player_up], self.pegging_count,
+                                                 go[1 - player_up], self.pegging_cards)
             # If the player has said go, skip their turn
             else:
                 go[player_up] = True
@@ -550,7 +241,7 @@ class Game:
                     self.set_message(
                         'Player ' + str(player_up + 1) +
                         ' scores 1 point for a go.')
-                elif not already_said:
+                elif not already_said and watching:
                     self.set_message(
                         'Player ' + str(player_up + 1) + ' says \'go\'!')
             # If it's not a go, it's the numerical rank of the card to play. Suit doesn't matter for this phase
@@ -558,64 +249,50 @@ class Game:
                 # Remove the played card from the temporary pegging hand and append it to the played pegging cards list
                 peg_card = pegging_hands[player_up].discard(peg_input)
                 self.pegging_cards[rounds_played].append(peg_card)
-                self.set_message('Player ' + str(player_up + 1) +
-                                 ' plays ' + str(peg_card))
-                # Update the pegging count
-                self.pegging_count += peg_card.value
+                if watching:
+                    self.set_message('Player ' + str(player_up + 1) +
+                                     ' plays ' + str(peg_card))
+                # Update the pegging count and score the play
+                pegging_state.push(peg_card)
+                self.pegging_count = pegging_state.count
 
                 # Check for scores
                 scores = []
-                score = 0
+                score = pegging_state.points
 
                 # Check for a run
-                if len(self.pegging_cards[rounds_played]) >= 3:
-                    # Count the last N cards for an N card run, but don't allow card 0 along with cards 2 and 3 to make a run
-                    for i in range(len(self.pegging_cards[rounds_played]), 2, -1):
-                        candidate_run = Hand(
-                            self.pegging_cards[rounds_played][-i:]).count_runs()
-                        # Check if a run was found and that its score matches what we're looking for
-                        if len(candidate_run) > 0 and candidate_run[0].points == i:
-                            scores.append('Player ' + str(player_up + 1) + ' scores ' + str(
-                                i) + ' points for a ' + str(i) + '-card run' + '!' * (i - 2))
-                            score += i
-                            # If one was, break, since we only want one
-                            break
+                if pegging_state.run > 0 and watching:
+                    i = pegging_state.run
+                    scores.append('Player ' + str(player_up + 1) + ' scores ' + str(
+                        i) + ' points for a ' + str(i) + '-card run' + '!' * (i - 2))
 
                 # Check for 2, 3, or 4 of a kind
-                if len(self.pegging_cards[rounds_played]) >= 2:
-                    # Start with the largest possible pair and work down. Don't allow duplicates, so break if we find something
-                    for i in range(min(len(self.pegging_cards[rounds_played]), 4), 1, -1):
-                        candidate_pair = Hand(
-                            self.pegging_cards[rounds_played][-i:]).count_pairs(i)
-                        if len(candidate_pair) > 0:
-                            pair = candidate_pair[0]
-                            msg = 'Player ' + \
-                                str(player_up + 1) + ' scores ' + \
-                                str(pair.points) + \
-                                ' points for a '
-                            if i == 2:
-                                msg += 'pair.'
-                            elif i == 3:
-                                msg += 'pair royal!!!'
-                            elif i == 4:
-                                msg += 'pair double royal!!!!!!'
-                            scores.append(msg)
-                            score += pair.points
-                            break
+                if pegging_state.streak > 1 and watching:
+                    i = pegging_state.streak
+                    msg = 'Player ' + \
+                        str(player_up + 1) + ' scores ' + \
+                        str(pegging_state.pair_points()) + \
+                        ' points for a '
+                    if i == 2:
+                        msg += 'pair.'
+                    elif i == 3:
+                        msg += 'pair royal!!!'
+                    elif i == 4:
+                        msg += 'pair double royal!!!!!!'
+                    scores.append(msg)
 
                 # A count equal to 15 is worth 2 points
-                if self.pegging_count == 15:
-                    score += 2
+                if self.pegging_count == 15 and watching:
                     scores.append('Player ' + str(player_up + 1) +
                                   ' scores 2 points for 15.')
 
                 # 31 scores 2 points and starts a new round without a go
                 if self.pegging_count == 31:
-                    score += 2
-                    scores.append('Player ' + str(player_up + 1) +
-                                  ' scores 2 points for 31.')
+                    if watching:
+                        scores.append('Player ' + str(player_up + 1) +
+                                      ' scores 2 points for 31.')
                 # Last card scores 1 point if it's not 31
-                elif not any([len(hand.cards) > 0 for hand in pegging_hands]):
+                elif not any(hand.cards for hand in pegging_hands):
                     score += 1
                     scores.append('Player ' + str(player_up + 1) +
                                   ' scores 1 point for last card.')
@@ -629,15 +306,16 @@ class Game:
                     if len(self.players) == 3:
                         go.append(True)
                 # Print scores for the play and add points if there were any
-                if len(scores) > 0:
+                if score > 0:
                     self.players[player_up].add_points(score)
                     self.set_message(*scores, append_msg=True)
             self.set_message('Press enter to continue.', append_msg=True)
-            input()
+            yield from self.acknowledge()
             # Reset for the next round if both players either have an empty hand or have said go, or if the count is 31
             if all([len(hand.cards) == 0 or go[i] for i, hand in enumerate(pegging_hands)]) or self.pegging_count == 31:
                 self.pegging_cards.append([])
                 self.pegging_count = 0
+                pegging_state.reset()
                 rounds_played += 1
                 # If a player has no cards, make sure their go status is True, otherwise reset
                 go = [len(hand.cards) == 0 for hand in pegging_hands]
@@ -653,7 +331,10 @@ class Game:
         self.pegging_cards = []
 
     # Count a hand, displaying information about the count in the UI
+    # Without anyone watching, it's just the total
     def count_hand(self, hand):
+        if not self.renderer.shows_messages:
+            return hand.count()
         scores = {'15s': hand.count_15s(),
                   'pairs': hand.count_pairs(2),
                   'pair_royal': hand.count_pairs(3),
@@ -716,46 +397,83 @@ class Game:
         count_order = list(count_order)
         for i in count_order:
             # Display the hand before counting it
-            self.set_message('Player ' + str(i + 1) +
-                             '\'s hand: ' + str(self.players[i].hand) + ' [' + str(self.upcard) + ']')
+            if self.renderer.shows_messages:
+                self.set_message('Player ' + str(i + 1) +
+                                 '\'s hand: ' + str(self.players[i].hand) + ' [' + str(self.upcard) + ']')
             # Tally up the hand and give the player their points
             self.players[i].add_points(self.count_hand(self.players[i].hand))
             # set_message will refresh the UI to show updated scores
             self.set_message('Press enter to continue.', append_msg=True)
-            input()
+            yield from self.acknowledge()
         # Same as above, but for the crib
-        self.set_message('Player ' + str(self.dealer[0] + 1) +
-                         '\'s crib: ' + str(self.crib) + ' [' + str(self.upcard) + ']')
+        if self.renderer.shows_messages:
+            self.set_message('Player ' + str(self.dealer[0] + 1) +
+                             '\'s crib: ' + str(self.crib) + ' [' + str(self.upcard) + ']')
         self.players[self.dealer[0]].add_points(self.count_hand(self.crib))
         self.set_message('Press enter to continue.', append_msg=True)
-        input()
+        yield from self.acknowledge()
+
+    # Wait for whoever is watching to read the latest messages. Without anyone watching, there's nothing to wait for
+    def acknowledge(self):
+        if self.renderer.shows_messages:
+            yield AcknowledgeRequest()
 
     # Callback method for player object to call as soon as it wins. This makes handling small frequent victory checks easier
+    # The result is kept on the game, and GameOver stops play wherever it is
     def player_victory(self, player_num):
         # Check for skunk (opponent scores fewer than 90 points), double skunk (fewer than 60), or triple skunk (30)
         if any(player.score < 30 for player in self.players):
+            skunk = 3
             self.set_message('Player ' + str(player_num + 1) +
                              ' shatters the resolve of all challengers with a TRIPLE SKUNK!!!!')
         elif any(player.score < 60 for player in self.players):
+            skunk = 2
             self.set_message('Player ' + str(player_num + 1) +
                              ' pulls an absolute power move with a DOUBLE SKUNK!!!')
         elif any(player.score < 90 for player in self.players):
+            skunk = 1
             self.set_message('Player ' + str(player_num + 1) +
                              ' asserts their dominance with a SKUNK!!')
         else:
+            skunk = 0
             self.set_message('Player ' + str(player_num + 1) + ' wins!')
-        input()
-        exit()
+        self.result = GameResult(player_num, [player.score for player in self.players], skunk, self.hands_played)
+        raise GameOver()
 
     # The high-level flow of the cribbage game happens here
+    # This is a generator: it yields a request from decisions.py whenever it needs a decision, is resumed by sending it
+    # the answer, and returns a GameResult once someone wins. Games can be paused betwixt requests for as long as needed
+    # AcknowledgeRequests are only yielded when the renderer shows messages, since otherwise there's nothing to read
+    def steps(self):
+        try:
+            # Cut the deck to determine who deals
+            self.switch_dealer((yield from self.get_dealer()))
+            # Play until
+            while all(player.score < 121 for player in self.players):
+                self.hands_played += 1
+                self.deal_hands()
+                yield from self.get_discards()
+                yield from self.get_upcard()
+                yield from self.pegging()
+                yield from self.show_hands()
+                self.switch_dealer(len(self.players) - 1)
+        except GameOver:
+            pass
+        yield from self.acknowledge()
+        return self.result
+
+    # Answer a request by asking the player it's for, or the renderer if it's just waiting on whoever is watching
+    def answer(self, request):
+        if request.player_num is None:
+            return self.renderer.pause()
+        return request.ask(self.players[request.player_num], self.set_message)
+
+    # Play the game to the end with the players and renderer answering every request. Returns a GameResult
     def play(self):
-        # Cut the deck to determine who deals
-        self.switch_dealer(self.get_dealer())
-        # Play until
-        while all(player.score < 121 for player in self.players):
-            self.deal_hands()
-            self.get_discards()
-            self.get_upcard()
-            self.pegging()
-            self.show_hands()
-            self.switch_dealer(len(self.players) - 1)
+        steps = self.steps()
+        answer = None
+        try:
+            while True:
+                answer = self.answer(steps.send(answer))
+        except StopIteration as stop:
+            return stop.value
@@ -1,7 +1,8 @@
 from card import Card
 from score import Score
-from itertools import chain, combinations
-import copy
+from cardmask import hand_mask, count_mask
+import score_table
+from itertools import chain, combinations, product
 
 
 class Hand:
@@ -15,8 +16,9 @@ class Hand:
     def __str__(self):
         return ' '.join(str(card) for card in sorted(self.cards, key=lambda card: card.num_rank) if card.num_rank != 0)
 
+    # Cards are immutable, so a copy only needs its own list of them
     def __copy__(self):
-        return Hand(copy.copy(self.cards), self.is_crib, copy.copy(self.upcard))
+        return Hand(list(self.cards), self.is_crib, self.upcard)
 
     # Return all of the cards of the hand plus the upcard as a single list of Cards
     def all_cards(self):
@@ -37,37 +39,36 @@ class Hand:
         raise Exception(str(num_rank) + ' of ' +
                         suit + ' does not exist in hand.')
 
+    # Return the 52-bit mask of the cards in the hand, not including the upcard
+    def mask(self):
+        return hand_mask(self.cards)
+
     # Count the entire hand and return just the score
+    # Regular hands are a lookup in the rank multiset score table, anything else goes through the bitmask scoring
+    # kernel. Both get the same total as adding up every count_* method without building a Score for each combination
     def count(self, pegging=False):
-        count_methods = [self.count_15s, lambda: self.count_pairs(2), lambda: self.count_pairs(3),
-                         lambda: self.count_pairs(4), self.count_runs, self.count_flush, self.count_nibs]
-        # Don't count flushes or nibs if pegging
         if pegging:
-            count_methods = count_methods[:-2]
-        scores = []
-        for method in count_methods:
-            results = method()
-            if len(results) > 0:
-                scores.extend(results)
-        # Check for 31 if pegging
-        if pegging and sum(card.num_rank for card in self.cards) == 31:
-            scores.append(Score(self.cards, 2))
-        if len(scores) > 0:
-            return sum([score.points for score in scores])
-        else:
-            return 0
+            return count_mask(self.mask(), self.upcard.index, self.is_crib, pegging)
+        return score_table.count_hand(self.cards, self.upcard, self.is_crib)
+
+    # Group the cards (including the upcard) by numerical rank. Index 0 is unused so ranks can index directly
+    def rank_histogram(self):
+        histogram = [[] for _ in range(14)]
+        for card in self.all_cards():
+            histogram[card.num_rank].append(card)
+        return histogram
 
     # Each distinct combination of cards that adds up to 15 is worth 2 points
     def count_15s(self):
-        fifteens = set()
-        # Check every unique combination of cards to see if they sum to 15
-        for i in range(2, 6):
-            card_combos = combinations(self.all_cards(), i)
-            for combo in card_combos:
-                if sum((card.value for card in combo)) == 15:
-                    # Store the combination as a Score object
-                    fifteens.add(Score(combo, 2))
-        return fifteens
+        # Build up every combination of at most 5 cards whose values add up to no more than 15, one rank at a time
+        # Each entry is the running total along with the cards that make it up
+        combos = [(0, ())]
+        for cards in self.rank_histogram():
+            for card in cards:
+                combos += [(total + card.value, combo + (card,)) for total, combo in combos
+                           if total + card.value <= 15 and len(combo) < 5]
+        # Store each combination that hits 15 as a Score object
+        return set(Score(combo, 2) for total, combo in combos if total == 15)
 
     # A pair is 2 of a kind for 2 points
     def count_pairs(self, pair_size=2, exclude_duplicates=True):
@@ -87,28 +88,31 @@ class Hand:
 
     # A run is 3 to 5 cards where the numerical ranks of the cards occur in sequence
     def count_runs(self):
-        runs = set()
-        for i in range(len(list(self.all_cards())), 2, -1):
-            card_combos = list(combinations(self.all_cards(), i))
-            for combo in card_combos:
-                # Sort the combination of cards based on numerical rank
-                sorted_combo = sorted(combo, key=lambda card: card.num_rank)
-                # If it's a run, every card will be followed by the next card in the list,
-                # with the obvious exception of the last card
-                if all((sorted_combo[j + 1].follows(sorted_combo[j]) for j in range(len(sorted_combo) - 1))):
-                    run = Score(sorted_combo, i)
-                    # Make sure the run isn't a partial copy of a longer run
-                    # There's no point in checking if there aren't any other runs yet
-                    if len(runs) == 0 or not any((run.cards.issubset(other_run.cards) for other_run in runs)):
-                        runs.add(run)
-        return list(runs)
+        runs = []
+        histogram = self.rank_histogram()
+        # Scan for stretches of consecutive ranks that each have at least one card
+        # Every way of picking one card per rank in a stretch of 3 or more is a separate run
+        run_start = 1
+        for num_rank in range(1, 15):
+            if num_rank < 14 and len(histogram[num_rank]) > 0:
+                continue
+            if num_rank - run_start >= 3:
+                for run in product(*histogram[run_start:num_rank]):
+                    runs.append(Score(run, num_rank - run_start))
+            run_start = num_rank + 1
+        return runs
 
     # A flush is five cards in the same suit (in the hand or the crib) or four cards not including the upcard (in the hand only)
     def count_flush(self):
         flush = []
         flush_suit = self.cards[0].suit
+        # Without an upcard, a flush is one point per card, so four cards on their own are only worth 4
+        if self.upcard.suit == '0':
+            if all(card.suit == flush_suit for card in self.cards) and \
+                    (len(self.cards) == 5 or len(self.cards) == 4 and not self.is_crib):
+                flush = [Score(self.cards, len(self.cards))]
         # Five card flush if the upcard also matches
-        if all(card.suit == flush_suit for card in self.all_cards()):
+        elif all(card.suit == flush_suit for card in self.all_cards()):
             flush = [Score(self.all_cards(), 5)]
         # Four card flushes can't include the upcard and can't be scored in a crib
         elif all(card.suit == flush_suit for card in self.cards) and not self.is_crib:
@@ -0,0 +1,37 @@
+# Exact odds of what the opponent is holding
+# The opponent's hand is hand_size cards drawn without replacement from the unseen cards, so the chance that it holds
+# none of k particular cards is hypergeometric: C(unseen - k, hand_size) / C(unseen, hand_size). Every rank and every
+# counting value is worked out in one pass per unseen-rank histogram and cached, since the pegging heuristics ask about
+# the same few ranks over and over for every candidate play
+
+CACHE_SIZE = 1 << 12
+cache = {}
+
+
+# Probability that hand_size cards drawn from num_unseen cards include none of num_matching particular cards
+def none_probability(num_matching, num_unseen, hand_size):
+    probability = 1.0
+    for drawn in range(min(hand_size, num_unseen)):
+        if num_unseen - num_matching - drawn <= 0:
+            return 0.0
+        probability *= (num_unseen - num_matching - drawn) / (num_unseen - drawn)
+    return probability
+
+
+# Probabilities that the opponent holds at least one card of each numerical rank (indexed 1-13) and of each counting
+# value (indexed 1-10), given the number of unseen cards of each numerical rank
+def holding_probabilities(remaining_cards, hand_size):
+    counts = tuple(remaining_cards.get(num_rank, 0) for num_rank in range(1, 14))
+    key = (counts, hand_size)
+    probabilities = cache.get(key)
+    if probabilities is None:
+        num_unseen = sum(counts)
+        by_rank = [0.0] + [1 - none_probability(count, num_unseen, hand_size) for count in counts]
+        # Every value is a single rank except 10, which is shared with the face cards
+        by_value = by_rank[:10] + [1 - none_probability(sum(counts[9:]), num_unseen, hand_size)]
+        probabilities = (by_rank, by_value)
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        cache[key] = probabilities
+    return probabilities
+
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+from peg_search import PeggingSearch
+from itertools import combinations_with_replacement
+from multiprocessing import Pool
+from array import array
+from os import path
+import sys
+import time
+
+
+# Offline opening-lead book for two-player pegging
+# For every 4-card keep (as ranks, since suits never matter in pegging) and every upcard rank, the opening lead is solved
+# with the exact pegging search: every hand the dealer could hold is weighted by the number of ways it can be drawn from
+# the cards we haven't seen, and the lead with the best expected net points is stored along with that expectation.
+# The leader is always the pone, so dealer status is implied by the entry.
+# Values below the chance node don't depend on the upcard, so each keep is searched once and weighted for every upcard.
+#
+# File layout (little-endian): magic, version, then the best lead rank of every entry (one byte, 0 where the keep and
+# upcard can't both exist), then the expected net points of every entry (float32). Entries are ordered by keep index,
+# then by upcard rank
+
+BOOK_FILE = path.join(path.dirname(path.abspath(__file__)), 'lead_book.bin')
+MAGIC = b'DSLB'
+VERSION = 1
+KEEPS = list(combinations_with_replacement(range(1, 14), 4))
+KEEP_INDEXES = {keep: index for index, keep in enumerate(KEEPS)}
+NUM_ENTRIES = len(KEEPS) * 13
+# Positions searched while building are kept in each process's transposition table, which is shared by every keep
+SEARCH_TABLE_SIZE = 1 << 22
+
+search = None
+
+
+def entry_index(keep, upcard_rank):
+    return KEEP_INDEXES[keep] * 13 + upcard_rank - 1
+
+
+# Unseen cards of each rank given a keep and (if there is one) the upcard rank
+def remaining_cards(keep, upcard_rank=0):
+    return {num_rank: 4 - keep.count(num_rank) - (num_rank == upcard_rank) for num_rank in range(1, 14)}
+
+
+# Solve the opening lead of a keep for every upcard rank. Returns the keep's index and a (lead, expected net points)
+# pair for each upcard rank, with a lead of 0 where the upcard can't go with the keep
+def solve_keep(keep):
+    global search
+    if search is None:
+        search = PeggingSearch(max_entries=SEARCH_TABLE_SIZE, max_nodes=float('inf'))
+    leads = sorted(set(keep))
+    values = {}
+    for theirs, ways in search.opponent_hands(remaining_cards(keep), 4):
+        values[theirs] = [search.play(0, (), keep, theirs, False, lead) for lead in leads]
+    results = []
+    for upcard_rank in range(1, 14):
+        if keep.count(upcard_rank) == 4:
+            results.append((0, 0.0))
+            continue
+        totals = [0] * len(leads)
+        total_ways = 0
+        for theirs, ways in search.opponent_hands(remaining_cards(keep, upcard_rank), 4):
+            total_ways += ways
+            for lead_index, value in enumerate(values[theirs]):
+                totals[lead_index] += ways * value
+        best = max(range(len(leads)), key=lambda lead_index: (totals[lead_index], leads[lead_index]))
+        results.append((leads[best], totals[best] / total_ways))
+    return KEEP_INDEXES[keep], results
+
+
+# Solve every keep, spreading them over a process per core (or solving them in this process if jobs is 1)
+def build_book(jobs=None):
+    leads = array('B', [0] * NUM_ENTRIES)
+    expected = array('f', [0.0] * NUM_ENTRIES)
+    if jobs == 1:
+        results = map(solve_keep, KEEPS)
+    else:
+        pool = Pool(jobs)
+        results = pool.imap_unordered(solve_keep, KEEPS)
+    for keep_index, keep_results in results:
+        for upcard_index, (lead, points) in enumerate(keep_results):
+            leads[keep_index * 13 + upcard_index] = lead
+            expected[keep_index * 13 + upcard_index] = points
+    if jobs != 1:
+        pool.close()
+        pool.join()
+    return leads, expected
+
+
+def save_book(book, file_name=BOOK_FILE):
+    leads, expected = book
+    expected = array('f', expected)
+    if sys.byteorder == 'big':
+        expected.byteswap()
+    with open(file_name, 'wb') as book_file:
+        book_file.write(MAGIC + bytes([VERSION]))
+        leads.tofile(book_file)
+        expected.tofile(book_file)
+
+
+# Load the book from disk, or return None if it's missing or from a different version
+def load_book(file_name=BOOK_FILE):
+    try:
+        with open(file_name, 'rb') as book_file:
+            if book_file.read(5) != MAGIC + bytes([VERSION]):
+                return None
+            leads = array('B')
+            leads.fromfile(book_file, NUM_ENTRIES)
+            expected = array('f')
+            expected.fromfile(book_file, NUM_ENTRIES)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == 'big':
+        expected.byteswap()
+    return leads, expected
+
+
+# The best opening lead for a keep (given as ranks) and upcard rank, and its expected net points
+# Returns None if there's no book or the keep isn't four cards
+def best_lead(ranks, upcard_rank):
+    if LEAD_BOOK is None or len(ranks) != 4:
+        return None
+    leads, expected = LEAD_BOOK
+    entry = entry_index(tuple(sorted(ranks)), upcard_rank)
+    if leads[entry] == 0:
+        return None
+    return leads[entry], expected[entry]
+
+
+LEAD_BOOK = load_book()
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    save_book(build_book(int(sys.argv[1]) if len(sys.argv) > 1 else None))
+    print('Wrote ' + BOOK_FILE + ' in ' + str(round(time.perf_counter() - start, 1)) + ' seconds.')
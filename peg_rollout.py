@@ -0,0 +1,252 @@
+from cardmask import NIBBLE_COUNTS, RANK_VALUES
+from types import SimpleNamespace
+import random
+import time
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Monte Carlo pegging rollouts, batched with NumPy
+# Every rollout is one sampled world: a hand the opponent could hold, drawn from the unseen cards, with each candidate
+# play made first and the rest of pegging played out by a fast default policy (play whatever scores the most right now,
+# breaking ties randomly). A batch of worlds is played out together as rows of arrays, so the per-card work is a handful
+# of array operations no matter how many worlds there are. Batches keep being played until the time budget runs out.
+#
+# The rules are the same ones Game.pegging scores by, as in peg_search. Values are net points for the player making the
+# play: their points minus the opponent's, from here to the end of pegging.
+
+HAND_SLOTS = 4
+# The most cards a round can hold in a two-player game
+ROUND_SLOTS = 8
+# Points for a streak of 1 to 4 of the same rank at the end of a round
+STREAK_POINTS = [0, 0, 2, 6, 12]
+
+if np is not None:
+    VALUES = np.array(RANK_VALUES, dtype=np.int16)
+    BITS = np.array([0] + [1 << num_rank for num_rank in range(1, 14)], dtype=np.int32)
+    # Number of set bits in a 14-bit mask of ranks
+    POPCOUNT = np.array([NIBBLE_COUNTS[mask & 0xF] + NIBBLE_COUNTS[mask >> 4 & 0xF] + NIBBLE_COUNTS[mask >> 8 & 0xF] +
+                         NIBBLE_COUNTS[mask >> 12] for mask in range(1 << 14)], dtype=np.int8)
+    STREAKS = np.array(STREAK_POINTS, dtype=np.int16)
+
+
+# Whether rollouts can be used at all
+def available():
+    return np is not None
+
+
+# A NumPy generator seeded from a random.Random (or the random module), so rollouts follow the caller's randomness
+def generator(rng=random):
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+# Points for appending each of the candidate ranks (shape worlds x candidates) to the current rounds
+# tail holds the ranks played this round right-aligned, most recent last, and length is how many of them there are
+def play_points(tail, length, count, candidates):
+    points = np.zeros(candidates.shape, dtype=np.int16)
+    # Pairs: extend the streak back from the most recent card while it matches
+    streak = np.ones(candidates.shape, dtype=np.int16)
+    matching = np.ones(candidates.shape, dtype=bool)
+    for back in range(1, HAND_SLOTS):
+        matching &= (tail[:, -back, None] == candidates) & (length[:, None] >= back)
+        streak += matching
+    points += STREAKS[streak]
+    # Runs: the longest tail ending with the candidate whose ranks are distinct and consecutive
+    bits = BITS[candidates]
+    high = candidates.copy()
+    low = candidates.copy()
+    run = np.zeros(candidates.shape, dtype=np.int16)
+    for back in range(1, ROUND_SLOTS):
+        ranks = tail[:, -back, None]
+        bits = bits | BITS[ranks]
+        high = np.maximum(high, ranks)
+        low = np.minimum(low, ranks)
+        size = back + 1
+        if size >= 3:
+            is_run = (length[:, None] >= back) & (POPCOUNT[bits] == size) & (high - low == size - 1)
+            run = np.where(is_run, size, run)
+    points += run
+    new_count = count[:, None] + VALUES[candidates]
+    points += 2 * ((new_count == 15) | (new_count == 31))
+    return points
+
+
+# Play out a batch of worlds to the end of pegging. Player 0 is the one we're evaluating for
+# hands: worlds x 2 x HAND_SLOTS ranks (0 for an empty slot), and the rest describe the current round and whose turn it is
+# Returns the points each player pegs in each world, as worlds x 2
+def play_out(rng, hands, tail, length, count, go, to_move):
+    num_worlds = hands.shape[0]
+    rows = np.arange(num_worlds)
+    scores = np.zeros((num_worlds, 2), dtype=np.int32)
+    # Plenty of steps: each one is a play, a go, or a skipped turn
+    for _ in range(4 * ROUND_SLOTS):
+        has_cards = (hands > 0).any(axis=2)
+        active = has_cards.any(axis=1)
+        if not active.any():
+            break
+        other = 1 - to_move
+        mine = hands[rows, to_move]
+        my_cards = has_cards[rows, to_move]
+        their_cards = has_cards[rows, other]
+        my_go = go[rows, to_move]
+        their_go = go[rows, other]
+
+        legal = (mine > 0) & (count[:, None] + VALUES[mine] <= 31)
+        can_play = legal.any(axis=1)
+        skip = active & (my_go | ~my_cards)
+        says_go = active & ~skip & ~can_play
+        plays = active & ~skip & can_play
+
+        # Skipped turns and goes that don't end the round just mark the mover as having said go
+        go[rows[skip], to_move[skip]] = True
+        go_point = says_go & their_go
+        go[rows[says_go], to_move[says_go]] = True
+        reset = says_go & (their_go | ~their_cards)
+
+        # Play the card that scores the most, breaking ties randomly
+        points = play_points(tail, length, count, mine)
+        preference = np.where(legal, points + rng.random(mine.shape), -1.0)
+        slot = preference.argmax(axis=1)
+        played = mine[rows, slot]
+        points = points[rows, slot]
+        play_rows = rows[plays]
+        hands[play_rows, to_move[plays], slot[plays]] = 0
+        count = np.where(plays, count + VALUES[played], count)
+        tail[plays] = np.roll(tail[plays], -1, axis=1)
+        tail[play_rows, -1] = played[plays]
+        length = np.where(plays, length + 1, length)
+        # Last card scores a point unless it's for 31
+        mine_left = (hands[rows, to_move] > 0).any(axis=1)
+        last_card = plays & ~mine_left & ~their_cards & (count != 31)
+        scores[rows, to_move] += go_point + np.where(plays, points + last_card, 0)
+        reset |= plays & ((count == 31) | (~mine_left & (their_go | ~their_cards)))
+
+        # New rounds start from zero, with only the players that are out of cards marked as having said go
+        if reset.any():
+            count = np.where(reset, 0, count)
+            length = np.where(reset, 0, length)
+            tail[reset] = 0
+            go[reset] = ~(hands[reset] > 0).any(axis=2)
+        to_move = np.where(active, other, to_move)
+    return scores
+
+
+# Expected net points for each rank we could play, estimated by playing out sampled worlds until the time budget runs
+# out. Returns (dict of rank to expected value, number of worlds played out per rank), or (None, 0) if there's nothing
+# to estimate
+def evaluate(my_ranks, round_ranks, count, opponent_go, remaining_cards, opponent_hand_size, time_budget=0.05,
+             batch_size=512, rng=None):
+    return evaluate_batch([(my_ranks, round_ranks, count, opponent_go, remaining_cards, opponent_hand_size)],
+                          time_budget, batch_size, rng)[0]
+
+
+# evaluate for many positions at once, each a tuple of evaluate's first six arguments
+# Every batch samples batch_size worlds for each position, and the worlds of every position and candidate play are
+# played out together, so the array operations are shared however many positions there are. The time budget is for all
+# of them together. With num_batches, exactly that many batches are played instead, however long they take, so the
+# results only depend on rng. Returns a (dict, worlds) pair for each position, like evaluate
+def evaluate_batch(positions, time_budget=0.05, batch_size=512, rng=None, num_batches=None):
+    if np is None:
+        return [(None, 0)] * len(positions)
+    if rng is None:
+        rng = generator()
+    start = time.perf_counter()
+    setups = []
+    for my_ranks, round_ranks, count, opponent_go, remaining_cards, opponent_hand_size in positions:
+        plays = [num_rank for num_rank in sorted(set(my_ranks)) if count + RANK_VALUES[num_rank] <= 31]
+        unseen = np.array([num_rank for num_rank in range(1, 14) for _ in range(remaining_cards.get(num_rank, 0))],
+                          dtype=np.int16)
+        if not plays or len(unseen) < opponent_hand_size or len(round_ranks) > ROUND_SLOTS:
+            setups.append(None)
+            continue
+        mine = np.zeros(HAND_SLOTS, dtype=np.int16)
+        mine[:len(my_ranks)] = my_ranks
+        round_tail = np.zeros(ROUND_SLOTS, dtype=np.int16)
+        if round_ranks:
+            round_tail[-len(round_ranks):] = round_ranks
+        setups.append(SimpleNamespace(plays=plays, unseen=unseen, mine=mine, round_tail=round_tail,
+                                      round_length=len(round_ranks), count=count, opponent_go=opponent_go,
+                                      opponent_hand_size=opponent_hand_size,
+                                      totals={num_rank: 0 for num_rank in plays}, worlds=0))
+    active = [setup for setup in setups if setup is not None]
+    batches = 0
+    while active and (batches < num_batches if num_batches is not None else
+                      batches == 0 or time.perf_counter() - start < time_budget):
+        batches += 1
+        # Rows for every world of every candidate play of every position, and which (position, play) each belongs to
+        rows = []
+        for setup in active:
+            # Sample the opponent's hands by shuffling the unseen cards in every world and taking the first few
+            shuffled = setup.unseen[rng.random((batch_size, len(setup.unseen))).argsort(axis=1)]
+            theirs = np.zeros((batch_size, HAND_SLOTS), dtype=np.int16)
+            theirs[:, :setup.opponent_hand_size] = shuffled[:, :setup.opponent_hand_size]
+            # If the opponent has said go, they can't be holding anything that plays on the current count
+            if setup.opponent_go:
+                theirs = theirs[~((theirs > 0) & (setup.count + VALUES[theirs] <= 31)).any(axis=1)]
+                if len(theirs) == 0:
+                    continue
+            setup.worlds += len(theirs)
+            # The same sampled hands are used for every candidate, so their differences aren't swamped by sampling noise
+            for num_rank in setup.plays:
+                rows.append((setup, num_rank, theirs))
+        if not rows:
+            continue
+        sizes = [len(theirs) for _, _, theirs in rows]
+        num_worlds = sum(sizes)
+        hands = np.empty((num_worlds, 2, HAND_SLOTS), dtype=np.int16)
+        hands[:, 0] = np.repeat(np.array([setup.mine for setup, _, _ in rows]), sizes, axis=0)
+        hands[:, 1] = np.concatenate([theirs for _, _, theirs in rows])
+        tail = np.repeat(np.array([setup.round_tail for setup, _, _ in rows]), sizes, axis=0)
+        length = np.repeat(np.array([setup.round_length for setup, _, _ in rows], dtype=np.int16), sizes)
+        counts = np.repeat(np.array([setup.count for setup, _, _ in rows], dtype=np.int16), sizes)
+        first = np.repeat(np.array([num_rank for _, num_rank, _ in rows], dtype=np.int16), sizes)
+        go = np.zeros((num_worlds, 2), dtype=bool)
+        go[:, 1] = np.repeat([setup.opponent_go or setup.opponent_hand_size == 0 for setup, _, _ in rows], sizes)
+        # Make the candidate play, then let the default policy take it from there
+        world_rows = np.arange(num_worlds)
+        slot = (hands[:, 0] == first[:, None]).argmax(axis=1)
+        hands[world_rows, 0, slot] = 0
+        points = play_points(tail, length, counts, first[:, None])[:, 0]
+        counts += VALUES[first]
+        tail = np.roll(tail, -1, axis=1)
+        tail[:, -1] = first
+        length += 1
+        mine_left = (hands[:, 0] > 0).any(axis=1)
+        their_cards = (hands[:, 1] > 0).any(axis=1)
+        points += ~mine_left & ~their_cards & (counts != 31)
+        reset = (counts == 31) | (~mine_left & (go[:, 1] | ~their_cards))
+        counts[reset] = 0
+        length[reset] = 0
+        tail[reset] = 0
+        go[reset] = ~(hands[reset] > 0).any(axis=2)
+        scores = play_out(rng, hands, tail, length, counts, go, np.ones(num_worlds, dtype=np.int64))
+        net = points.astype(np.int64) + scores[:, 0] - scores[:, 1]
+        for (setup, num_rank, _), total in zip(rows, np.add.reduceat(net, np.cumsum([0] + sizes[:-1]))):
+            setup.totals[num_rank] += int(total)
+    return [(None, 0) if setup is None or setup.worlds == 0 else
+            ({num_rank: total / setup.worlds for num_rank, total in setup.totals.items()}, setup.worlds)
+            for setup in setups]
+
+
+# Total net pegging points for each 4-card keep (as ranks) over num_worlds sampled opponent hands apiece, played out
+# from the start of pegging by the default policy. Opponent hands are drawn from every card that isn't in the keep, and
+# the pone leads, so the opponent does when we're the dealer. dealer is either one flag for every keep or a list with a
+# flag for each
+def play_keeps(keeps, dealer, num_worlds, rng=None):
+    if rng is None:
+        rng = generator()
+    pools = np.array([[num_rank for num_rank in range(1, 14) for _ in range(4 - keep.count(num_rank))]
+                      for keep in keeps], dtype=np.int16)
+    keep_rows = np.repeat(np.arange(len(keeps)), num_worlds)
+    drawn = rng.random((len(keep_rows), pools.shape[1])).argsort(axis=1)[:, :HAND_SLOTS]
+    hands = np.empty((len(keep_rows), 2, HAND_SLOTS), dtype=np.int16)
+    hands[:, 0] = np.array(keeps, dtype=np.int16)[keep_rows]
+    hands[:, 1] = pools[keep_rows[:, None], drawn]
+    num_rows = len(keep_rows)
+    scores = play_out(rng, hands, np.zeros((num_rows, ROUND_SLOTS), dtype=np.int16),
+                      np.zeros(num_rows, dtype=np.int16), np.zeros(num_rows, dtype=np.int16),
+                      np.zeros((num_rows, 2), dtype=bool),
+                      np.broadcast_to(np.asarray(dealer, dtype=np.int64), len(keeps))[keep_rows])
+    return (scores[:, 0] - scores[:, 1]).reshape(len(keeps), num_worlds).sum(axis=1)
@@ -0,0 +1,177 @@
+from cardmask import BINOMIALS, RANK_VALUES
+import time
+
+
+# Exact expectimax search over the rest of a two-player pegging phase
+# The opponent's hand is the only hidden information, so the root is a chance node over every hand the opponent could
+# hold (weighted by how many ways it can be drawn from the unseen cards). Below that, both hands are known and play is
+# searched exhaustively with the same rules Game.pegging scores by. Values are net points: points for the player to
+# move minus points for the other player, from here to the end of pegging.
+#
+# Positions are compact tuples: (count, ranks played this round, mover's ranks, other player's ranks, whether the
+# mover has said go, whether the other player has said go). Suits never matter in pegging, so hands are sorted tuples of
+# numerical ranks. Positions are memoized in a bounded transposition table that's shared between searches
+
+# Exceeded the node budget or deadline of a search
+class SearchAborted(Exception):
+    pass
+
+
+# Points for the last rank played in a round (pairs, runs, 15, and 31), not counting go or last card
+def play_points(ranks, count):
+    points = 0
+    last = ranks[-1]
+    # Pairs: 2, 6, or 12 for a streak of 2, 3, or 4 of the same rank at the end of the round
+    streak = 1
+    while streak < len(ranks) and ranks[-streak - 1] == last:
+        streak += 1
+    points += streak * (streak - 1)
+    # Runs: the longest stretch at the end of the round made of consecutive distinct ranks
+    for length in range(len(ranks), 2, -1):
+        tail = ranks[-length:]
+        if max(tail) - min(tail) == length - 1 and len(set(tail)) == length:
+            points += length
+            break
+    if count == 15 or count == 31:
+        points += 2
+    return points
+
+
+# Remove one of a rank from a sorted tuple of ranks
+def without(ranks, num_rank):
+    position = ranks.index(num_rank)
+    return ranks[:position] + ranks[position + 1:]
+
+
+class PeggingSearch:
+    def __init__(self, max_entries=1 << 20, max_nodes=100000):
+        self.max_entries = max_entries
+        self.max_nodes = max_nodes
+        self.table = {}
+        # Points for each sequence of ranks played in a round
+        self.points = {}
+        self.nodes = 0
+        # time.perf_counter() value the current search has to finish by, or None if it only has a node budget
+        self.deadline = None
+        # Stats about the last search: nodes visited, opponent hands considered, plays searched, seconds taken, and
+        # whether it finished
+        self.stats = {}
+
+    # Net points for the player to move from a position, with both hands known
+    def solve(self, count, ranks, mine, theirs, my_go, their_go):
+        if not mine and not theirs:
+            return 0
+        key = (count, ranks, mine, theirs, my_go, their_go)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        self.nodes += 1
+        # The clock is only checked every so often, since it costs more than a node
+        if self.nodes > self.max_nodes or (self.deadline is not None and self.nodes & 0x3FF == 0 and
+                                           time.perf_counter() >= self.deadline):
+            raise SearchAborted()
+
+        # A player that's out of cards or has already said go gets skipped
+        if my_go or not mine:
+            value = -self.solve(count, ranks, theirs, mine, their_go, True)
+        else:
+            plays = [num_rank for num_rank in sorted(set(mine)) if count + RANK_VALUES[num_rank] <= 31]
+            if not plays:
+                # Saying go after the other player already has scores a point and starts a new round
+                if their_go:
+                    value = 1 - self.solve(0, (), theirs, mine, not theirs, False)
+                # Saying go when the other player is out of cards (but hasn't been skipped yet) just starts a new round
+                elif not theirs:
+                    value = -self.solve(0, (), theirs, mine, True, False)
+                else:
+                    value = -self.solve(count, ranks, theirs, mine, their_go, True)
+            else:
+                value = None
+                for num_rank in plays:
+                    play_value = self.play(count, ranks, mine, theirs, their_go, num_rank)
+                    if value is None or play_value > value:
+                        value = play_value
+
+        if len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[key] = value
+        return value
+
+    # Net points for the player to move from playing one of num_rank
+    def play(self, count, ranks, mine, theirs, their_go, num_rank):
+        new_count = count + RANK_VALUES[num_rank]
+        new_ranks = ranks + (num_rank,)
+        new_mine = without(mine, num_rank)
+        # The ranks played this round decide the count too, so they're all the points need to be cached by
+        points = self.points.get(new_ranks)
+        if points is None:
+            points = play_points(new_ranks, new_count)
+            if len(self.points) >= self.max_entries:
+                self.points.clear()
+            self.points[new_ranks] = points
+        # 31 starts a new round with the other player up
+        if new_count == 31:
+            return points - self.solve(0, (), theirs, new_mine, not theirs, not new_mine)
+        # Last card
+        if not new_mine and not theirs:
+            return points + 1
+        # Nobody left to play this round
+        if not new_mine and (their_go or not theirs):
+            return points - self.solve(0, (), theirs, new_mine, not theirs, True)
+        return points - self.solve(new_count, new_ranks, theirs, new_mine, their_go, False)
+
+    # Every hand of hand_size cards the opponent could hold, as (sorted ranks, number of ways to draw it)
+    @staticmethod
+    def opponent_hands(remaining_cards, hand_size):
+        ranks = [num_rank for num_rank in range(1, 14) if remaining_cards.get(num_rank, 0) > 0]
+        hands = []
+
+        def extend(position, hand, ways, cards_left):
+            if cards_left == 0:
+                hands.append((tuple(hand), ways))
+                return
+            if position == len(ranks):
+                return
+            num_rank = ranks[position]
+            available = remaining_cards[num_rank]
+            for taken in range(min(available, cards_left), -1, -1):
+                extend(position + 1, hand + [num_rank] * taken, ways * BINOMIALS[available][taken], cards_left - taken)
+
+        extend(0, [], 1, hand_size)
+        return hands
+
+    # Expected net points for each rank we could play, averaged over the opponent's possible hands
+    # Plays are searched one at a time, in the order given by plays (most promising first) or by rank otherwise. If the
+    # search runs past its node budget or deadline, only the plays that finished are in the returned dict, or it's None
+    # if none did
+    def evaluate(self, my_ranks, round_ranks, count, opponent_go, remaining_cards, opponent_hand_size, plays=None,
+                 deadline=None):
+        start = time.perf_counter()
+        self.nodes = 0
+        self.deadline = deadline
+        mine = tuple(sorted(my_ranks))
+        round_ranks = tuple(round_ranks)
+        hands = self.opponent_hands(remaining_cards, opponent_hand_size)
+        # If the opponent has said go, they can't be holding anything that plays on the current count
+        if opponent_go:
+            hands = [(hand, ways) for hand, ways in hands
+                     if all(count + RANK_VALUES[num_rank] > 31 for num_rank in hand)]
+        if plays is None:
+            plays = sorted(set(mine))
+        plays = [num_rank for num_rank in plays if num_rank in mine and count + RANK_VALUES[num_rank] <= 31]
+        expected = {}
+        total_ways = sum(ways for hand, ways in hands)
+        self.stats = {'nodes': 0, 'hands': len(hands), 'plays': 0, 'seconds': 0.0, 'complete': False}
+        if total_ways == 0 or not plays:
+            return None
+        try:
+            for num_rank in plays:
+                total = 0
+                for theirs, ways in hands:
+                    total += ways * self.play(count, round_ranks, mine, theirs, opponent_go, num_rank)
+                expected[num_rank] = total / total_ways
+        except SearchAborted:
+            pass
+        self.stats.update(nodes=self.nodes, plays=len(expected), seconds=time.perf_counter() - start,
+                          complete=len(expected) == len(plays))
+        return expected or None
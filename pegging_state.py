@@ -0,0 +1,65 @@
+from card import Card
+from run_table import run_length
+
+
+# Scoring state of the current pegging round
+# Pushing a card updates the count, the length of the streak of matching ranks at the end of the round, and the longest
+# run ending with the card, without going back over the rest of the round. The run check only needs the ranks of the
+# last few cards, which are looked up in the run-completion table. Game.pegging scores plays with this, and the AI uses
+# it to score hypothetical plays
+class PeggingState:
+    # A round holds at most 13 distinct ranks, so there's never a longer run to look for
+    RUN_WINDOW = 12
+
+    def __init__(self, cards=()):
+        self.count = 0
+        self.ranks = []
+        # Number of cards of the same rank at the end of the round
+        self.streak = 0
+        # Length of the run made by the last card, or 0 if it didn't make one
+        self.run = 0
+        # Points scored by the last card for pairs, runs, 15, and 31
+        self.points = 0
+        for card in cards:
+            self.push(card)
+
+    def copy(self):
+        state = PeggingState()
+        state.count = self.count
+        state.ranks = self.ranks[-PeggingState.RUN_WINDOW:]
+        state.streak = self.streak
+        state.run = self.run
+        state.points = self.points
+        return state
+
+    # Play a card onto the round. Returns the points it scores for pairs, runs, 15, and 31
+    def push(self, card: Card):
+        if self.ranks and self.ranks[-1] == card.num_rank:
+            self.streak += 1
+        else:
+            self.streak = 1
+        self.run = run_length(self.ranks[-PeggingState.RUN_WINDOW:], card.num_rank)
+        self.ranks.append(card.num_rank)
+        self.count += card.value
+        self.points = self.pair_points() + self.run
+        if self.count == 15 or self.count == 31:
+            self.points += 2
+        return self.points
+
+    # The state after a hypothetical play, leaving this one as it was
+    def after(self, card: Card):
+        state = self.copy()
+        state.push(card)
+        return state
+
+    # 2, 6, or 12 points for 2, 3, or 4 of a kind at the end of the round
+    def pair_points(self):
+        return self.streak ** 2 - self.streak
+
+    # Start a new round
+    def reset(self):
+        self.count = 0
+        self.ranks = []
+        self.streak = 0
+        self.run = 0
+        self.points = 0
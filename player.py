@@ -1,19 +1,33 @@
 from hand import Hand
-from card import Card
+from card import Card, RANK_CARDS
 from deck import Deck
+from analysis import evaluate_keeps, evaluate_keeps_until, estimate_keep, estimate_keeps, set_workers
+from crib_table import crib_points
+from score_table import count_hand
+from discard_book import BOOK
+from peg_search import PeggingSearch
+from lead_book import best_lead
+from win_table import AVERAGES, DEVIATIONS, WIN_TABLE, after_hand
+import peg_rollout
+from holdings import holding_probabilities, none_probability
+from run_table import run_completions, run_length
+from pegging_state import PeggingState
+from canonical import canonicalize, key_cards, cards_from_canonical
 from types import SimpleNamespace
 from itertools import combinations, chain
-from statistics import pstdev, mean
 from colorama import Style
 import traceback
 import copy
 import random
+import time
 
 
 # Base Player class
+# Every random choice a player makes comes from rng, which a game shares with its deck
 class Player:
-    def __init__(self, victory_callback, player_num):
+    def __init__(self, victory_callback, player_num, rng=None):
         self.victory = victory_callback
+        self.rng = rng if rng is not None else random.Random()
         self.player_num = player_num
         self.score = 0
         self.last_score = -1
@@ -37,11 +51,10 @@ class Player:
 
 # Class for human player
 class HumanPlayer(Player):
-    def __init__(self, victory_callback, player_num):
-        super().__init__(victory_callback, player_num)
+    def __init__(self, victory_callback, player_num, rng=None):
+        super().__init__(victory_callback, player_num, rng)
 
-    @staticmethod
-    def cut_deck(set_message):
+    def cut_deck(self, set_message):
         set_message(
             'Enter number between 4 and 32 or press enter for random cut.', append_msg=True)
         while True:
@@ -53,7 +66,7 @@ class HumanPlayer(Player):
                 else:
                     raise ValueError
             except ValueError:
-                return random.randint(4, 32)
+                return self.rng.randint(4, 32)
 
     # Get card input from player
     @staticmethod
@@ -187,7 +200,7 @@ class HumanPlayer(Player):
                         discard_input = self.get_card_input(1)
                         # Make sure the card they entered exists in our hand and is a legal play
                         if discard_input[0] in [card.num_rank for card in available_cards.cards] and \
-                                Card(discard_input[0]).value + pegging_count <= 31:
+                                RANK_CARDS[discard_input[0]].value + pegging_count <= 31:
                             return discard_input[0]
                         else:
                             raise ValueError
@@ -210,112 +223,303 @@ class HumanPlayer(Player):
 
 # Class for AI player
 class AIPlayer(Player):
+    # Live discard analysis results shared by every AI player, keyed by (canonical hand, dealer)
+    discard_cache = {}
+    DISCARD_CACHE_SIZE = 1 << 16
+    # Number of 4-card keeps in a hand of 5 or 6 cards
+    NUM_KEEPS = {5: 5, 6: 15}
+    # Exact pegging search, with a transposition table shared by every AI player
+    peg_search = PeggingSearch()
+    # Seconds of Monte Carlo rollouts for pegging plays that are too big to search exactly
+    ROLLOUT_BUDGET = 0.1
+    # Sampled pegging results for keeps, shared by every AI player: (keep ranks, dealer) -> [total net points, hands]
+    pegging_cache = {}
+    PEGGING_CACHE_SIZE = 1 << 14
+    # Seconds per discard decision for sampling how keeps peg, how many sampled opponent hands are enough for a keep,
+    # and how many are sampled for each keep at a time
+    PEGGING_BUDGET = 0.25
+    PEGGING_HANDS = 2048
+    PEGGING_BATCH = 128
+    # Fixed amounts of work for deterministic AIs in place of the time budgets: batches of rollouts for a pegging play,
+    # and sampled opponent hands for each keep
+    DETERMINISTIC_ROLLOUT_BATCHES = 4
+    DETERMINISTIC_PEGGING_HANDS = 512
+    # What each difficulty spends on a decision, so the lower ones do less work instead of throwing good analysis away
+    # keeps: how many keeps are sampled when discarding (None for all of them)
+    # upcards: whether keeps are scored with every possible upcard, or estimated from their cards and the crib table
+    # pegging: how far ahead pegging plays look. 0 plays any card, 1 takes the most points right away, and 2 weighs the
+    # opponent's replies (with the exact search, rollouts, and lead book in a two-player game)
+    DIFFICULTY_BUDGETS = {1: {'keeps': 3, 'upcards': False, 'pegging': 0},
+                          2: {'keeps': None, 'upcards': False, 'pegging': 1},
+                          3: {'keeps': None, 'upcards': True, 'pegging': 2}}
+
     def __init__(self, victory_callback, player_num, **kwargs):
-        super().__init__(victory_callback, player_num)
+        super().__init__(victory_callback, player_num, kwargs.get('rng'))
         self.difficulty = kwargs['difficulty']
+        self.budget = AIPlayer.DIFFICULTY_BUDGETS[self.difficulty]
         self.verbose = kwargs['verbose']
+        self.num_players = kwargs.get('num_players', 2)
+        # Whether hard difficulty counts how well each keep pegs when discarding
+        self.discard_pegging = kwargs.get('discard_pegging', True)
+        # Seconds the AI can spend on each decision, or None for as long as its difficulty takes
+        self.decision_time = kwargs.get('decision_time')
+        # A deterministic AI does fixed amounts of work instead of whatever fits in its time budgets, and keeps its own
+        # caches instead of sharing them, so with a seeded rng it makes the same decisions every time. It ignores the
+        # decision time, since a deadline would make it depend on the clock again
+        self.deterministic = kwargs.get('deterministic', False)
+        if self.deterministic:
+            self.decision_time = None
+            self.discard_cache = {}
+            self.pegging_cache = {}
+            self.peg_search = PeggingSearch()
         self.known_cards = []
+        # How far the analysis of the last decision got: the deepest stage it used, how much of that stage finished,
+        # seconds taken, and whether it finished before the deadline. None if the decision didn't need any analysis
+        self.last_search = None
+        # The worker pool for discard analysis is shared, so this sets it for every AI player
+        if 'workers' in kwargs:
+            set_workers(kwargs['workers'])
 
-    @staticmethod
-    def cut_deck(*args):
-        return random.randint(4, 32)
+    def cut_deck(self, *args):
+        return self.rng.randint(4, 32)
 
     def print_message(self, *message):
         if self.verbose:
             print(*message)
 
     # Selects and returns a list of the discards and removes them from its Hand object
-    def select_discards(self, set_message, dealer, opponent_score, num_cards=2):
-        # Get best discards, sorted by highest expected net points
-        best_discards = self.get_best_discards(dealer)
-        # Play more recklessly if justified by the score
+    # The deadline is a time.perf_counter() value, and defaults to the AI's decision time from now if it has one
+    def select_discards(self, set_message, dealer, opponent_score, num_cards=2, opponent='Opponent', deadline=None):
+        return AIPlayer.select_discards_batch([self], [dealer], [opponent_score], deadline)[0]
+
+    # Discards for several AI players at once, such as one from each of many games being played together, in order
+    # Keeps are estimated for every player that estimates them in one go, and the pegging of every hard player's keeps
+    # is sampled together, so the time budgets and the deadline are for the whole batch rather than each decision. The
+    # deadline defaults to the shortest decision time of the players from now
+    @staticmethod
+    def select_discards_batch(players, dealer_flags, scores, deadline=None):
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = AIPlayer.batch_deadline(players, start)
+        discards = [None] * len(players)
+        # Players that estimate every keep are scored together, and the few keeps the others sample are quicker to
+        # estimate one at a time
+        estimated = []
+        analyzed = []
+        for index, (player, dealer) in enumerate(zip(players, dealer_flags)):
+            if player.budget['upcards']:
+                analyzed.append(index)
+                continue
+            keeps = list(combinations(player.hand.cards, 4))
+            if player.budget['keeps'] is None or len(keeps) <= player.budget['keeps']:
+                estimated.append(index)
+                continue
+            keeps = player.rng.sample(keeps, player.budget['keeps'])
+            keep = max(keeps, key=lambda sampled: estimate_keep(
+                sampled, [card for card in player.hand.cards if card not in sampled], dealer))
+            discards[index] = [card for card in player.hand.cards if card not in keep]
+            player.last_search = {'stage': 'estimate', 'keeps': len(keeps), 'complete': True,
+                                  'seconds': time.perf_counter() - start}
+        if estimated:
+            estimates = estimate_keeps([players[index].hand.cards for index in estimated],
+                                       [dealer_flags[index] for index in estimated])
+            for index, keep_estimates in zip(estimated, estimates):
+                player = players[index]
+                # The first of the best keeps, as sorting the estimates would have it
+                keeps = list(combinations(player.hand.cards, 4))
+                keep = keeps[max(range(len(keeps)), key=keep_estimates.__getitem__)]
+                discards[index] = [card for card in player.hand.cards if card not in keep]
+                player.last_search = {'stage': 'estimate', 'keeps': len(keeps), 'complete': True,
+                                      'seconds': time.perf_counter() - start}
+        if analyzed:
+            best_discards = AIPlayer.get_best_discards_batch([players[index] for index in analyzed],
+                                                             [dealer_flags[index] for index in analyzed], deadline)
+            for index, all_hands in zip(analyzed, best_discards):
+                discards[index] = players[index].choose_discard(all_hands, dealer_flags[index], scores[index])
+        for player, discard in zip(players, discards):
+            player.known_cards = copy.copy(discard)
+            player.hand.cards = [card for card in player.hand.cards if card not in discard]
+        return discards
+
+    # The deadline for a batch of decisions starting now: the shortest decision time of the players from now, or None
+    @staticmethod
+    def batch_deadline(players, start):
+        decision_times = [player.decision_time for player in players if player.decision_time is not None]
+        return start + min(decision_times) if decision_times else None
+
+    # Pick a discard from the analyzed discards, sorted by highest expected net points, adjusting for the score
+    def choose_discard(self, best_discards, dealer, opponent_score):
+        # With a win-probability table, go for whichever discard gives the best chance of winning the game
+        if WIN_TABLE is not None and self.num_players == 2:
+            best_discards = self.sort_by_win_probability(best_discards, dealer, opponent_score)
+        # Otherwise, play more recklessly if justified by the score
         # The dealer scores 16 points on average betwixt pegging, hand, and crib
         # If they're likely to get to 121 by their next count, it's better to optimize for hand score instead of net
-        if opponent_score > 104 and not dealer:
+        elif opponent_score > 104 and not dealer:
             best_discards = sorted(best_discards, key=lambda x: x['avg'], reverse=True)
         # Take a moonshot if defeat seems likely anyways
         elif opponent_score > 110 and ((self.score < 100 and not dealer) or self.score < 90):
-            best_discards = sorted(best_discards, key=lambda x: x['max'], reverse=True)
-        # At the highest difficulty, always make the best play
-        if self.difficulty == 3:
-            discard_index = 0
-        # At medium difficulty, choose randomly between the five best plays
-        elif self.difficulty == 2:
-            discard_index = random.randrange(0, 5)
-        # Yeet two random cards into the crib at easy difficulty
-        else:
-            discard_index = random.randrange(0, len(best_discards))
-        discard = best_discards[discard_index]['discard']
-        self.known_cards = copy.copy(discard)
-        self.hand.cards = [card for card in self.hand.cards if card not in discard]
-        return discard
+            best_discards = sorted(best_discards, key=lambda x: x['max'][0][1], reverse=True)
+        return best_discards[0]['discard']
 
-    def get_peg_play(self, set_message, available_cards, pegging_count, opponent_go, played_cards):
-        # Get remaining cards in the deck. All cards played or seen so far are excluded
-        excluded_cards = list(chain(list(chain(*played_cards)), self.known_cards, self.hand.cards, [self.hand.upcard]))
-        deck = Deck()
-        remaining_cards = {i: 0 for i in range(1, 14)}
-        # Suit doesn't matter, so convert the list of cards to a frequency distribution for easier processing
-        for card in deck.cards:
-            if card not in excluded_cards:
-                remaining_cards[card.num_rank] += 1
+    def get_peg_play(self, set_message, available_cards, pegging_count, opponent_go, played_cards, deadline=None):
+        return AIPlayer.peg_play_batch([(self, available_cards, pegging_count, opponent_go, played_cards)], deadline)[0]
+
+    # Pegging plays for several AI players at once, such as one from each of many games being played together, in order
+    # states are (player, available cards, pegging count, opponent go, played cards) tuples, the same as get_peg_play's
+    # arguments. Each play is worked out as far as it can be alone, then the rollouts of every play that needs them are
+    # played out together, so the rollout budget and the deadline are for the whole batch rather than each play. The
+    # deadline defaults to the shortest decision time of the players from now
+    @staticmethod
+    def peg_play_batch(states, deadline=None):
+        start = time.perf_counter()
+        players = [state[0] for state in states]
+        if deadline is None:
+            deadline = AIPlayer.batch_deadline(players, start)
+        plays = []
+        positions = []
+        for player, available_cards, pegging_count, opponent_go, played_cards in states:
+            play, position = player.prepare_peg_play(available_cards, pegging_count, opponent_go, played_cards, start,
+                                                     None if player.deterministic else deadline)
+            plays.append(play)
+            positions.append(position)
+        # Plays that the search couldn't finish are estimated with rollouts. If there's no time left for those, or NumPy
+        # isn't installed, they're made as prepared
+        # Deterministic players play a fixed number of rollout batches of their own, with their own rng
+        pending = []
+        for index, position in enumerate(positions):
+            if position is None:
+                continue
+            player = players[index]
+            if not player.deterministic:
+                pending.append(index)
+                continue
+            rollout_start = time.perf_counter()
+            expected, rollouts = peg_rollout.evaluate_batch([position], rng=peg_rollout.generator(player.rng),
+                                                            num_batches=AIPlayer.DETERMINISTIC_ROLLOUT_BATCHES)[0]
+            player.finish_peg_play(plays, index, expected, {'stage': 'rollouts', 'rollouts': rollouts,
+                                                            'seconds': time.perf_counter() - rollout_start,
+                                                            'complete': True})
+        if not pending:
+            return plays
+        rollout_budget = AIPlayer.ROLLOUT_BUDGET
+        if deadline is not None:
+            rollout_budget = min(rollout_budget, deadline - time.perf_counter())
+        if rollout_budget > 0:
+            rollout_start = time.perf_counter()
+            results = peg_rollout.evaluate_batch([positions[index] for index in pending], rollout_budget,
+                                                 rng=peg_rollout.generator(players[pending[0]].rng))
+            for index, (expected, rollouts) in zip(pending, results):
+                players[index].finish_peg_play(plays, index, expected, {
+                    'stage': 'rollouts', 'rollouts': rollouts, 'seconds': time.perf_counter() - rollout_start,
+                    'complete': rollout_budget == AIPlayer.ROLLOUT_BUDGET})
+        return plays
+
+    # Record how the rollouts for plays[index] went, and make the best play they found if they found any
+    def finish_peg_play(self, plays, index, expected, last_search):
+        self.last_search = last_search
+        self.print_message('search', self.last_search)
+        if expected is not None:
+            self.print_message('expected net points', expected)
+            plays[index] = max(expected, key=expected.get)
+
+    # Work out a pegging play as far as it can be done without rollouts
+    # Returns (play, position): the play to make, and the position to estimate with rollouts first (as a tuple of
+    # peg_rollout.evaluate arguments) if it needs them, or None if the play is settled
+    def prepare_peg_play(self, available_cards, pegging_count, opponent_go, played_cards, start, deadline):
         # A card is considered playable if its counting value plus the current count doesn't exceed 31
         playable_cards = [card for card in available_cards.cards if card.value + pegging_count <= 31]
-        opponent_hand_size = 8 - len(list(chain(*played_cards))) - len(available_cards.cards)
-        self.print_message('playable', ' '.join(str(card) for card in playable_cards))
-        self.print_message('played so far this round', ' '.join(str(card) for card in played_cards[-1]), '\n--------\n')
-        self.print_message('remaining', remaining_cards)
+        if self.verbose:
+            self.print_message('playable', ' '.join(str(card) for card in playable_cards))
+            self.print_message('played so far this round', ' '.join(str(card) for card in played_cards[-1]),
+                               '\n--------\n')
+        self.last_search = None
         # If no cards are playable, return -1 for a go
         if len(playable_cards) == 0:
-            return -1
+            return -1, None
         # If only one card is playable then there's no sense analyzing it
         elif len(playable_cards) == 1:
-            return playable_cards[0].num_rank
-        # Assign a weight to each playable card based on various factors if more than one is playable
-        else:
-            play_weights = self.get_pegging_weights(playable_cards, played_cards, remaining_cards, pegging_count,
-                                                    opponent_hand_size)
-            # Make the best play on hard difficulty
-            if self.difficulty == 3:
-                return_index = 0
-            # Make a decent play on medium difficulty
-            elif self.difficulty == 2:
-                # This is safe because we never have list of play weights with a length less than 2
-                return_index = random.randint(0, 1)
-            # Play whatever feels groovy on easy difficulty
-            else:
-                return_index = random.randrange(0, len(play_weights))
-            return play_weights[return_index].num_rank
+            return playable_cards[0].num_rank, None
+        # Play whatever feels groovy on easy difficulty
+        if self.budget['pegging'] == 0:
+            return self.rng.choice(playable_cards).num_rank, None
+        # Take whatever scores the most right now on medium difficulty, without looking at the opponent's replies
+        if self.budget['pegging'] == 1:
+            round_state = PeggingState(played_cards[-1])
+            return max(playable_cards, key=lambda card: round_state.after(card).points).num_rank, None
+        # Get remaining cards in the deck. All cards played or seen so far are excluded
+        # Suit doesn't matter, so get them as a frequency distribution of ranks for easier processing
+        remaining_cards = Deck.unseen_rank_histogram(
+            chain(chain(*played_cards), self.known_cards, self.hand.cards, [self.hand.upcard]))
+        opponent_hand_size = 8 - len(list(chain(*played_cards))) - len(available_cards.cards)
+        self.print_message('remaining', remaining_cards)
+        # On hard difficulty, take any play that pegs out
+        if self.budget['pegging'] == 2:
+            round_state = PeggingState(played_cards[-1])
+            for card in playable_cards:
+                if self.score + round_state.after(card).points >= 121:
+                    self.print_message('pegging out with', card)
+                    return card.num_rank, None
+        # The opening lead of a two-player hand on hard difficulty comes straight from the lead book, if there is one
+        if self.budget['pegging'] == 2 and self.num_players == 2 and not any(played_cards):
+            lead = best_lead([card.num_rank for card in available_cards.cards], self.hand.upcard.num_rank)
+            if lead is not None:
+                self.print_message('book lead', lead)
+                return lead[0], None
+        # Start from the heuristic weights, which are cheap and always finish, then refine them while there's time
+        play_weights = self.get_pegging_weights(playable_cards, played_cards, remaining_cards, pegging_count,
+                                                opponent_hand_size)
+        self.last_search = {'stage': 'weights', 'seconds': time.perf_counter() - start, 'complete': True}
+        # Search the rest of the pegging phase exactly on hard difficulty in a two-player game, most promising plays first
+        # The opening lead is too big a tree to search in time, so it (and any search that runs past its node budget or
+        # the deadline) is left for rollouts instead, which fall back on the best of the plays the search finished, or
+        # else the best weighted play
+        if self.budget['pegging'] == 2 and self.num_players == 2:
+            my_ranks = [card.num_rank for card in available_cards.cards]
+            round_ranks = [card.num_rank for card in played_cards[-1]]
+            finished = None
+            if len(my_ranks) + opponent_hand_size < 8:
+                plays = list(dict.fromkeys(card.num_rank for card in play_weights))
+                expected = self.peg_search.evaluate(my_ranks, round_ranks, pegging_count, opponent_go,
+                                                    remaining_cards, opponent_hand_size, plays, deadline)
+                self.last_search = dict(self.peg_search.stats, stage='search')
+                if self.last_search['complete']:
+                    self.print_message('search', self.last_search)
+                    self.print_message('expected net points', expected)
+                    return max(expected, key=expected.get), None
+                finished = expected
+            play = play_weights[0].num_rank if finished is None else max(finished, key=finished.get)
+            if not peg_rollout.available():
+                return play, None
+            return play, (my_ranks, round_ranks, pegging_count, opponent_go, remaining_cards, opponent_hand_size)
+        return play_weights[0].num_rank, None
 
     def get_pegging_weights(self, playable_cards, played_cards, remaining_cards, pegging_count, opponent_hand_size):
         # Get the cards played so far this round
         round_cards = played_cards[-1]
         self.print_message('opponent hand size', opponent_hand_size, '\n')
 
-        # Calculate probability that opponent has a particular card
+        # Exact probabilities that the opponent holds each rank and value, worked out once for this state
+        rank_probabilities, value_probabilities = holding_probabilities(remaining_cards, opponent_hand_size)
+
+        # Probability that opponent has a particular card
         def opponent_card_probability(card, by_value=False):
-            total_remaining_cards = sum(remaining_cards.values())
-            if card.num_rank < 10 or not by_value:
-                num_cards_remaining = remaining_cards[card.num_rank]
             # If calculating by value, face cards go with 10's
-            else:
-                num_cards_remaining = sum(remaining_cards[i] for i in range(10, 14))
-            # Get the probability that any individual remaining card IS the one in question
-            individual_probability = num_cards_remaining / total_remaining_cards
-            # Calculate the probability that NONE of the cards in the hand are the card in question
-            probability_of_none = (1 - individual_probability) ** opponent_hand_size
-            # Invert it and return, since we want the probability that at least one card IS the card in question
-            return 1 - probability_of_none
+            if by_value:
+                return value_probabilities[card.value]
+            return rank_probabilities[card.num_rank]
 
         # Initialize weights dictionary
         play_weights = {card: 0.0 for card in playable_cards}
         # Analyze the cards. I decided on a heuristic approach here. A brute-force approach would
         # provide marginally better results, but is very computationally expensive to do in Python
         # Also, the heuristic approach is arguably a lot more fun to write and easier to follow
+        round_state = PeggingState(round_cards)
         for card in playable_cards:
             self.print_message('analyzing', card)
             other_playable_cards = [other_card for other_card in playable_cards if other_card is not card]
-            new_count = pegging_count + card.value
+            new_state = round_state.after(card)
+            new_count = new_state.count
             new_cards = copy.copy(round_cards)
             new_cards.append(card)
             self.print_message('new count', new_count)
@@ -328,7 +532,7 @@ class AIPlayer(Player):
                     needed_value = 15 - new_count
                 else:
                     needed_value = 31 - new_count
-                play_weights[card] -= 2 * opponent_card_probability(Card(needed_value), True)
+                play_weights[card] -= 2 * opponent_card_probability(RANK_CARDS[needed_value], True)
                 self.print_message('opponent 15 or 31 potential with', needed_value, play_weights[card])
 
             # Set up 15's and 31's if able
@@ -336,8 +540,8 @@ class AIPlayer(Player):
             # value of ten card (the most common opponent play) is equal to 15 or 31
             if any(new_count + other_card.value + 10 in {15, 31} for other_card in other_playable_cards):
                 # 2 points for 15 or 31, multiplied by the probability of the opponent playing a 10
-                play_weights[card] += 2 * opponent_card_probability(Card(10), True)
-                self.print_message('probability of opponent 10 card', opponent_card_probability(Card(10), True))
+                play_weights[card] += 2 * opponent_card_probability(RANK_CARDS[10], True)
+                self.print_message('probability of opponent 10 card', opponent_card_probability(RANK_CARDS[10], True))
                 self.print_message('set up for 15 or 31', play_weights[card])
             # Take counts of 15 or 31 if offered
             elif new_count in {15, 31}:
@@ -346,23 +550,18 @@ class AIPlayer(Player):
 
             # Weight for a pair, pair royal, or pair double royal if offered
             self.print_message('\nanalyzing pairs')
-            pair = False
-            for i in range(min(len(new_cards), 4), 1, -1):
-                # Check the last i cards for an i-sized pair, starting with 4 (if possible) and going down to 2
-                candidate_pair = Hand(new_cards[-i:]).count_pairs(i)
-                if len(candidate_pair) > 0:
-                    # Weight for the number of points that will be scored
-                    play_weights[card] += candidate_pair[0].points
-                    self.print_message(str(i) + ' of a kind', play_weights[card])
-                    # Weight for potential opponent counter (if there's room), which can't happen to a 4 of a kind
-                    if i != 4 and new_count + card.value <= 31:
-                        self.print_message('probability of opponent', card.rank, ' ', opponent_card_probability(card))
-                        play_weights[card] -= ((i + 1) ** 2 - (i + 1)) * opponent_card_probability(card)
-                        self.print_message(str(i + 1) + ' of a kind opponent counter', play_weights[card])
-                    pair = True
-                    break
+            i = new_state.streak
+            if i > 1:
+                # Weight for the number of points that will be scored
+                play_weights[card] += new_state.pair_points()
+                self.print_message(str(i) + ' of a kind', play_weights[card])
+                # Weight for potential opponent counter (if there's room), which can't happen to a 4 of a kind
+                if i != 4 and new_count + card.value <= 31:
+                    self.print_message('probability of opponent', card.rank, ' ', opponent_card_probability(card))
+                    play_weights[card] -= ((i + 1) ** 2 - (i + 1)) * opponent_card_probability(card)
+                    self.print_message(str(i + 1) + ' of a kind opponent counter', play_weights[card])
             # If there's no pair, take potential pairs into consideration
-            if not pair:
+            else:
                 # Account for opponent pair potential, but only if they have room to score a pair
                 if new_count + card.value <= 31:
                     play_weights[card] -= 2 * opponent_card_probability(card)
@@ -379,47 +578,28 @@ class AIPlayer(Player):
 
             # Weight for a run
             self.print_message('\nanalyzing runs')
-            if len(new_cards) >= 3:
-                for i in range(len(new_cards), 2, -1):
-                    candidate_run = Hand(
-                        new_cards[-i:]).count_runs()
-                    # Check if a run was found and that its score matches what we're looking for
-                    if len(candidate_run) > 0 and candidate_run[0].points == i:
-                        play_weights[card] += i
-                        self.print_message(i, 'card run', play_weights[card])
-                        break
-
-            # Weight for potential opponent run
+            if new_state.run > 0:
+                play_weights[card] += new_state.run
+                self.print_message(new_state.run, 'card run', play_weights[card])
+
+            # Weight for potential opponent run, which is looked up from the ranks that would make a run out of every
+            # card played this round
             if len(new_cards) >= 2:
-                for i in range(len(new_cards) + 1, 2, -1):
-                    for remaining_card_rank, num in remaining_cards.items():
-                        remaining_card = Card(remaining_card_rank)
-                        # Don't worry about cards that would put the count over 31
-                        if remaining_card.value + new_count > 31:
-                            continue
-                        # Combine the new card with the currently played cards and count runs
-                        hypothetical_cards = copy.copy(new_cards)
-                        hypothetical_cards.append(remaining_card)
-                        candidate_run = Hand(hypothetical_cards[-i:]).count_runs()
-                        # Check if the given opponent play would result in a run and that it's the right size
-                        if len(candidate_run) > 0 and candidate_run[0].points == len(hypothetical_cards):
-                            play_weights[card] -= candidate_run[0].points * opponent_card_probability(remaining_card)
-                            self.print_message('opponent', i, 'card run potential with', remaining_card, play_weights[card])
-                            # If we can counter the potential run, we'll either get 1 or 0 net points
-                            for other_card in other_playable_cards:
-                                if other_card.value + remaining_card.value + new_count <= 31:
-                                    counter_cards = copy.copy(hypothetical_cards)
-                                    counter_cards.append(other_card)
-                                    found_counter = False
-                                    for j in range(len(counter_cards), 2, -1):
-                                        counter_run = Hand(counter_cards[-j:]).count_runs()
-                                        if any(run.points == j for run in counter_run):
-                                            play_weights[card] += j * opponent_card_probability(remaining_card)
-                                            self.print_message(j, 'card counter run', play_weights[card])
-                                            found_counter = True
-                                            break
-                                    if found_counter:
-                                        break
+                for remaining_card_rank, run in run_completions(new_state.ranks).items():
+                    remaining_card = RANK_CARDS[remaining_card_rank]
+                    # Don't worry about cards that would put the count over 31
+                    if remaining_card.value + new_count > 31:
+                        continue
+                    play_weights[card] -= run * opponent_card_probability(remaining_card)
+                    self.print_message('opponent', run, 'card run potential with', remaining_card, play_weights[card])
+                    # If we can counter the potential run, we'll either get 1 or 0 net points
+                    for other_card in other_playable_cards:
+                        if other_card.value + remaining_card.value + new_count <= 31:
+                            counter_run = run_length(new_state.ranks + [remaining_card_rank], other_card.num_rank)
+                            if counter_run > 0:
+                                play_weights[card] += counter_run * opponent_card_probability(remaining_card)
+                                self.print_message(counter_run, 'card counter run', play_weights[card])
+                                break
 
             # Weight for opponent and self go potential
             self.print_message('\nanalyzing gos')
@@ -440,7 +620,7 @@ class AIPlayer(Player):
                 num_go_cards = 0
                 self.print_message('opponent go cards ')
                 for num_rank, num_remaining in remaining_cards.items():
-                    opponent_card = Card(num_rank)
+                    opponent_card = RANK_CARDS[num_rank]
                     if opponent_card.value >= smallest_opponent_go_card and opponent_card.value + new_count < 31:
                         self.print_message(opponent_card)
                         num_go_cards += num_remaining
@@ -448,7 +628,8 @@ class AIPlayer(Player):
                 self.print_message('number of remaining cards', sum(remaining_cards.values()))
                 self.print_message('number of go cards', num_go_cards)
                 if num_go_cards > 1:
-                    opponent_go_probability = (1 - num_go_cards / sum(remaining_cards.values())) ** opponent_hand_size
+                    opponent_go_probability = none_probability(num_go_cards, sum(remaining_cards.values()),
+                                                               opponent_hand_size)
                     self.print_message('odds of opponent having a go card', opponent_go_probability)
                     play_weights[card] -= opponent_go_probability
                     self.print_message('opponent go potential with', smallest_opponent_go_card, '-', 30 - new_count, play_weights[card])
@@ -459,7 +640,7 @@ class AIPlayer(Player):
                 num_playable_cards = 0
                 self.print_message('opponent playable cards ')
                 for num_rank, num_remaining in remaining_cards.items():
-                    opponent_card = Card(num_rank)
+                    opponent_card = RANK_CARDS[num_rank]
                     if opponent_card.value <= largest_opponent_playable_card:
                         self.print_message(opponent_card)
                         num_playable_cards += num_remaining
@@ -493,54 +674,210 @@ class AIPlayer(Player):
         return sorted(play_weights, key=play_weights.get, reverse=True)
 
     # Analyze a hand of 5 or 6 cards and determine the mathematically optimal discards
-    def get_best_discards(self, dealer):
-        # Create a Deck object to represent all the potential upcards
-        deck_remainder = Deck()
-        deck_remainder.cards = set(self.hand.cards).symmetric_difference(deck_remainder.cards)
-        deck_remainder.cards = [
-            card for card in deck_remainder.cards if card not in self.hand.cards]
-        # Two cards must be discarded, leaving us with a 4-card hand to be analyzed
-        potential_hands = list(Hand(hand)
-                               for hand in combinations(self.hand.cards, 4))
+    # Difficulties that don't go through the upcards estimate their keeps instead. On hard difficulty in a two-player
+    # game, the expected pegging points of each keep count towards its net points
+    # With a deadline, only the keeps analyzed in time are returned, and pegging points are sampled until it passes
+    def get_best_discards(self, dealer, deadline=None):
+        return AIPlayer.get_best_discards_batch([self], [dealer], deadline)[0]
+
+    # get_best_discards for several AI players at once, with the pegging of all their keeps sampled together
+    @staticmethod
+    def get_best_discards_batch(players, dealer_flags, deadline=None):
+        start = time.perf_counter()
+        best_discards = []
+        pegging = []
+        for player, dealer in zip(players, dealer_flags):
+            if not player.budget['upcards']:
+                keeps = list(combinations(player.hand.cards, 4))
+                if player.budget['keeps'] is not None and len(keeps) > player.budget['keeps']:
+                    keeps = player.rng.sample(keeps, player.budget['keeps'])
+                player.last_search = {'stage': 'estimate', 'keeps': len(keeps), 'complete': True}
+                best_discards.append(player.estimate_discards(player.hand.cards, keeps, dealer))
+                continue
+            all_hands = player.get_discard_stats(dealer, None if player.deterministic else deadline)
+            player.last_search = {'stage': 'analysis', 'keeps': AIPlayer.NUM_KEEPS[len(player.hand.cards)],
+                                  'analyzed': len(all_hands)}
+            if player.num_players == 2 and player.discard_pegging and peg_rollout.available():
+                pegging.append(len(best_discards))
+            best_discards.append(all_hands)
+        # Keeps are sampled together for every player sharing the pegging cache, and on their own for each
+        # deterministic player, with its own cache and a fixed number of sampled hands
+        groups = [[index for index in pegging if not players[index].deterministic]]
+        groups.extend([index] for index in pegging if players[index].deterministic)
+        for group in groups:
+            if not group:
+                continue
+            player = players[group[0]]
+            if player.deterministic:
+                pegged = AIPlayer.add_pegging_points([best_discards[group[0]]], [dealer_flags[group[0]]],
+                                                     rng=player.rng, cache=player.pegging_cache,
+                                                     num_hands=AIPlayer.DETERMINISTIC_PEGGING_HANDS)
+            else:
+                pegged = AIPlayer.add_pegging_points([best_discards[index] for index in group],
+                                                     [dealer_flags[index] for index in group], deadline, player.rng)
+            for index, all_hands in zip(group, pegged):
+                best_discards[index] = all_hands
+                players[index].last_search.update(stage='pegging', pegging_hands=min(
+                    hand_info.get('pegging_hands', 0) for hand_info in all_hands))
+        for player in players:
+            if player.budget['upcards']:
+                player.last_search['complete'] = player.deterministic or deadline is None or \
+                    time.perf_counter() < deadline
+            player.last_search['seconds'] = time.perf_counter() - start
+        return best_discards
+
+    # Estimate the net points of the given keeps from the score table and crib table alone, without going through the
+    # upcards. The keep is counted as four cards, so 'avg' is what it's guaranteed to score rather than its average
+    # Sorted by highest estimated net points, like analyze_discards
+    @staticmethod
+    def estimate_discards(cards, keeps, dealer):
+        all_hands = []
+        for keep in keeps:
+            discard = [card for card in cards if card not in keep]
+            crib = AIPlayer.expected_crib_points(discard)
+            points = count_hand(keep)
+            all_hands.append({'hand': Hand(list(keep)), 'avg': points, 'discard': discard, 'crib_points': crib,
+                              'net_points': points + crib if dealer else points - crib})
+        return sorted(all_hands, key=lambda x: x['net_points'], reverse=True)
+
+    # Stats for every way to discard from the hand, sorted by highest expected net points from the hand and crib
+    def get_discard_stats(self, dealer, deadline=None):
+        # Look the hand up in the precomputed discard book if there is one, otherwise analyze it live
+        if BOOK is not None:
+            book_hands = BOOK.lookup(self.hand.cards, dealer)
+            if book_hands is not None:
+                return book_hands
+        # Live results are cached by canonical hand, so every suit relabelling of a hand shares one analysis
+        key, permutation = canonicalize(self.hand.cards)
+        canonical_hands = self.discard_cache.get((key, dealer))
+        if canonical_hands is None:
+            canonical_hands = self.analyze_discards(key_cards(key), dealer, deadline)
+            # Only finished analyses are cached, so a rushed decision doesn't stand in for later ones
+            if len(canonical_hands) == AIPlayer.NUM_KEEPS[len(self.hand.cards)]:
+                if len(self.discard_cache) >= AIPlayer.DISCARD_CACHE_SIZE:
+                    self.discard_cache.clear()
+                self.discard_cache[(key, dealer)] = canonical_hands
+        return [self.relabel_hand_info(hand_info, permutation) for hand_info in canonical_hands]
+
+    # Estimate the chance of winning the game with each discard, and sort by it (then by net points)
+    # Each player's points for the rest of the hand are the averages from the win table, with this discard's hand, crib,
+    # and pegging in place of ours. Both players' points are spread out around those averages by their standard
+    # deviations (with a three-point rule that matches a normal distribution), so long shots are worth more when they're
+    # the only way to win. That's nine table reads per discard
+    def sort_by_win_probability(self, all_hands, dealer, opponent_score):
+        if dealer:
+            my_pegging, opponent_pegging = 'dealer pegging', 'pone pegging'
+            opponent_hand = 'pone hand'
+        else:
+            my_pegging, opponent_pegging = 'pone pegging', 'dealer pegging'
+            opponent_hand = 'dealer hand'
+        average_pegging = AVERAGES[my_pegging] - AVERAGES[opponent_pegging]
+        for hand_info in all_hands:
+            my_points = AVERAGES[my_pegging] + hand_info['avg']
+            my_variance = DEVIATIONS[my_pegging] ** 2 + hand_info['std_dev'] ** 2
+            their_points = AVERAGES[opponent_pegging] + AVERAGES[opponent_hand]
+            their_variance = DEVIATIONS[opponent_pegging] ** 2 + DEVIATIONS[opponent_hand] ** 2
+            if dealer:
+                my_points += hand_info['crib_points']
+                my_variance += DEVIATIONS['crib'] ** 2
+            else:
+                their_points += hand_info['crib_points']
+                their_variance += DEVIATIONS['crib'] ** 2
+            # How much better or worse than average this keep pegs, split betwixt the two players
+            if 'pegging_points' in hand_info:
+                pegging_edge = (hand_info['pegging_points'] - average_pegging) / 2
+                my_points += pegging_edge
+                their_points -= pegging_edge
+            hand_info['win_probability'] = 0.0
+            for my_spread, my_weight in AIPlayer.spread_points(my_variance):
+                for their_spread, their_weight in AIPlayer.spread_points(their_variance):
+                    # A low spread can take a weak keep below zero, but nobody loses points
+                    hand_info['win_probability'] += my_weight * their_weight * after_hand(
+                        max(0, round(self.score + my_points + my_spread)),
+                        max(0, round(opponent_score + their_points + their_spread)), dealer)
+        return sorted(all_hands, key=lambda x: (x['win_probability'], x['net_points']), reverse=True)
+
+    # Offsets and weights of a three-point approximation of a normal distribution with the given variance
+    @staticmethod
+    def spread_points(variance):
+        offset = (3 * variance) ** 0.5
+        return [(-offset, 1 / 6), (0, 2 / 3), (offset, 1 / 6)]
+
+    # Add the expected net pegging points of each keep to its hand info, and re-sort by net points
+    # Pegging only depends on ranks, so keeps are sampled by their ranks against opponent hands drawn from every other
+    # card. Sampling carries on until every keep has enough sampled hands or this decision's time budget runs out (as
+    # long as every keep has some), and the results are cached so later decisions pick up where this one left off
+    # A deadline stops sampling outright, and if it passes before every keep has some, pegging is left out
+    # Opponent hands are drawn with rng (a random.Random), or the random module if there isn't one
+    # Takes a list of hand info lists with the dealer flag for each, so the keeps of many decisions (which often share
+    # ranks) are sampled together in the same batches and time budget. Returns the lists in the same order
+    # cache defaults to the one shared by every AI player. With num_hands, every keep is sampled until it has exactly that
+    # many hands, however long it takes, and the time budget and deadline are ignored
+    @staticmethod
+    def add_pegging_points(hand_lists, dealer_flags, deadline=None, rng=random, cache=None, num_hands=None):
+        start = time.perf_counter()
+        if cache is None:
+            cache = AIPlayer.pegging_cache
+        key_lists = [[(tuple(sorted(card.num_rank for card in hand_info['hand'].cards)), dealer)
+                      for hand_info in all_hands] for all_hands, dealer in zip(hand_lists, dealer_flags)]
+        keys = set(chain(*key_lists))
+        if len(cache) + len(keys) > AIPlayer.PEGGING_CACHE_SIZE:
+            cache.clear()
+        for key in keys:
+            cache.setdefault(key, [0, 0])
+        while True:
+            pending = sorted(key for key in keys if cache[key][1] < (num_hands or AIPlayer.PEGGING_HANDS))
+            now = time.perf_counter()
+            if not pending or num_hands is None and ((deadline is not None and now >= deadline) or (
+                    now - start >= AIPlayer.PEGGING_BUDGET and all(cache[key][1] > 0 for key in keys))):
+                break
+            totals = peg_rollout.play_keeps([keep for keep, _ in pending], [dealer for _, dealer in pending],
+                                            AIPlayer.PEGGING_BATCH, peg_rollout.generator(rng))
+            for key, total in zip(pending, totals):
+                cache[key][0] += int(total)
+                cache[key][1] += AIPlayer.PEGGING_BATCH
+        pegged = []
+        for all_hands, hand_keys in zip(hand_lists, key_lists):
+            if any(cache[key][1] == 0 for key in hand_keys):
+                pegged.append(all_hands)
+                continue
+            for hand_info, key in zip(all_hands, hand_keys):
+                total, sampled_hands = cache[key]
+                hand_info['pegging_points'] = total / sampled_hands
+                hand_info['pegging_hands'] = sampled_hands
+                hand_info['net_points'] += hand_info['pegging_points']
+            pegged.append(sorted(all_hands, key=lambda x: x['net_points'], reverse=True))
+        return pegged
+
+    # Get stats for every way to discard from the given cards, sorted by highest expected net points
+    # With a deadline, keeps are analyzed one at a time from the best estimate down, and only those analyzed in time are
+    # returned
+    @staticmethod
+    def analyze_discards(cards, dealer, deadline=None):
+        # All the cards not in our hand are potential upcards
+        upcards = Deck.unseen_cards(cards)
         # Get stats about how each hand performs and how their associated discards are expected to play in the crib
         all_hands = []
-        for hand in potential_hands:
-            # Count the hand with each upcard
-            upcard_counts = []
-            for upcard in deck_remainder.cards:
-                hand.upcard = upcard
-                upcard_counts.append((upcard, hand.count()))
-            # Calculate all the stats we need for the hand
-            hand_info = {}
-            counts = [count[1] for count in upcard_counts]
+        # Two cards must be discarded, leaving us with a 4-card hand to be analyzed
+        # Each hand is scored once and every upcard's count derived from it, in the worker pool if there is one
+        keeps = list(combinations(cards, 4))
+        if deadline is None:
+            results = evaluate_keeps(keeps, upcards)
+        else:
+            keeps = [hand_info['hand'].cards for hand_info in AIPlayer.estimate_discards(cards, keeps, dealer)]
+            results = evaluate_keeps_until(keeps, upcards, deadline)
+        for keep, hand_info in zip(keeps, results):
             # The two cards that aren't in this potential hand are the cards we discarded
             hand_info['discard'] = [
-                card for card in self.hand.cards if card not in hand.cards]
-            hand_info['avg'] = mean(counts)
-            hand_info['crib_points'] = self.expected_crib_points(
-                hand_info['discard'], dealer)
+                card for card in cards if card not in keep]
+            hand_info['crib_points'] = AIPlayer.expected_crib_points(
+                hand_info['discard'])
             if dealer:
                 hand_info['net_points'] = hand_info['avg'] + \
                                           hand_info['crib_points']
             else:
                 hand_info['net_points'] = hand_info['avg'] - \
                                           hand_info['crib_points']
-            # Store which particular upcards lead to the min/max scores
-            hand_info['max'] = [(Card(), 0)]
-            hand_info['min'] = [(Card(), 100)]
-            for count in upcard_counts:
-                if count[1] > hand_info['max'][0][1]:
-                    hand_info['max'] = [count]
-                elif count[1] == hand_info['max'][0][1]:
-                    hand_info['max'].append(count)
-                if count[1] < hand_info['min'][0][1]:
-                    hand_info['min'] = [count]
-                elif count[1] == hand_info['min'][0][1]:
-                    hand_info['min'].append(count)
-            hand_info['std_dev'] = pstdev(counts)
-            # Reset the upcard before storing
-            hand.upcard = Card()
-            hand_info['hand'] = hand
             # Add all of the hand's info to the list of hands
             all_hands.append(hand_info)
         # Sort the hands by total net expected points
@@ -549,47 +886,20 @@ class AIPlayer(Player):
         # Return the list of discards
         return all_hands
 
+    # Copy a hand info dict from canonical suits back into the suits of an actual hand
+    @staticmethod
+    def relabel_hand_info(hand_info, permutation):
+        relabelled = dict(hand_info)
+        relabelled['hand'] = Hand(cards_from_canonical(hand_info['hand'].cards, permutation))
+        relabelled['discard'] = cards_from_canonical(hand_info['discard'], permutation)
+        for extreme in ('max', 'min'):
+            upcards = cards_from_canonical([upcard for upcard, count in hand_info[extreme]], permutation)
+            relabelled[extreme] = [(upcard, count) for upcard, (_, count) in zip(upcards, hand_info[extreme])]
+        return relabelled
+
     # Determine the expected number of points that a given discard will give to the crib
-    # For now, this is implemented via a lookup table created from publicly available data
-    # If I can ever figure out a way to calculate it dynamically myself without an unacceptable
-    # performance hit, I'll do so. For now, this will have to do
+    # This is a lookup in the exact, suit-aware crib table generated by crib_table.py. The crib scores the same
+    # whoever owns it, so callers add it when dealing and subtract it otherwise
     @staticmethod
-    def expected_crib_points(discards, dealer=True):
-        # Initialize lookup tables for estimated crib points by discard for both dealer and pone
-        DEALER_TABLE = {1: [5.2, 4.4, 4.6, 5.2, 5.2, 3.7, 3.7, 3.7, 3.3, 3.3, 3.5, 3.3, 3.3],
-                        2: [4.4, 5.8, 6.9, 4.6, 5.2, 3.9, 3.9, 3.7, 3.7, 3.6, 3.8, 3.6, 3.6],
-                        3: [4.6, 6.9, 5.9, 5, 5.9, 3.8, 3.8, 3.9, 3.7, 3.6, 3.9, 3.7, 3.7],
-                        4: [5.2, 4.6, 5, 5.5, 6.3, 3.9, 3.7, 3.9, 3.6, 3.4, 3.7, 3.5, 3.5],
-                        5: [5.2, 5.2, 5.9, 6.3, 8.5, 6.4, 5.8, 5.3, 5.1, 6.3, 6.7, 6.4, 6.3],
-                        6: [3.7, 3.9, 3.8, 3.9, 6.4, 5.6, 4.9, 4.6, 4.9, 3, 3.2, 3, 2.9],
-                        7: [3.7, 3.9, 3.8, 3.7, 5.8, 4.9, 5.8, 6.4, 4, 3.1, 3.3, 3.1, 3.1],
-                        8: [3.7, 3.7, 3.9, 3.9, 5.3, 4.6, 6.4, 5.3, 4.5, 3.7, 3.3, 3.1, 3],
-                        9: [3.3, 3.7, 3.7, 3.6, 5.1, 4.9, 4, 4.5, 4.9, 4.1, 3.7, 2.8, 2.8],
-                        10: [3.3, 3.6, 3.6, 3.4, 6.3, 3, 3.1, 3.7, 4.1, 4.6, 4.3, 3.3, 2.7],
-                        11: [3.5, 3.8, 3.9, 3.7, 6.7, 3.2, 3.3, 3.3, 3.7, 4.3, 5.1, 4.5, 3.8],
-                        12: [3.3, 3.6, 3.7, 3.5, 6.4, 3, 3.1, 3.1, 2.8, 3.3, 4.5, 4.5, 3.4],
-                        13: [3.3, 3.6, 3.7, 3.5, 6.3, 2.9, 3.1, 3, 2.8, 2.7, 3.8, 3.4, 4.4]}
-        PONE_TABLE = {1: [5.4, 4.5, 4.7, 5.3, 5.5, 4.4, 4.3, 4.4, 4.1, 3.9, 4.2, 3.9, 3.9],
-                      2: [4.5, 5.7, 6.7, 4.8, 5.5, 4.6, 4.5, 4.4, 4.3, 4.1, 4.4, 4.1, 4.1],
-                      3: [4.7, 6.7, 6, 5.4, 6, 4.4, 4.5, 4.5, 4.3, 4.2, 4.5, 4.2, 4.1],
-                      4: [5.3, 4.8, 5.4, 5.7, 6.5, 4.7, 4.3, 4.4, 4.3, 4, 4.3, 4, 4],
-                      5: [5.5, 5.5, 6, 6.5, 7.4, 6.6, 6.1, 5.6, 5.5, 6.4, 6.7, 6.4, 6.4],
-                      6: [4.4, 4.6, 4.4, 4.7, 6.6, 6.2, 5.8, 5.4, 5.5, 3.9, 4.1, 3.8, 3.8],
-                      7: [4.3, 4.5, 4.5, 4.3, 6.1, 5.8, 6.2, 6.7, 4.8, 3.9, 4.2, 3.9, 3.9],
-                      8: [4.4, 4.4, 4.5, 4.4, 5.6, 5.4, 6.7, 5.8, 5.3, 4.5, 4.1, 3.9, 3.8],
-                      9: [4.1, 4.3, 4.3, 4.3, 5.5, 5.5, 4.8, 5.3, 5.5, 4.8, 4.4, 3.7, 3.7],
-                      10: [3.9, 4.1, 4.2, 4, 6.4, 3.9, 3.9, 4.5, 4.8, 5.1, 5, 4.1, 3.5],
-                      11: [4.2, 4.4, 4.5, 4.3, 6.7, 4.1, 4.2, 4.1, 4.4, 5, 5.5, 5, 4.4],
-                      12: [3.9, 4.1, 4.2, 4, 6.4, 3.8, 3.9, 3.9, 3.7, 4.1, 5, 5, 4],
-                      13: [3.9, 4.1, 4.1, 4, 6.4, 3.8, 3.9, 3.8, 3.7, 3.5, 4.4, 4, 4.8]}
-        if len(discards) == 2:
-            if dealer:
-                return DEALER_TABLE[discards[0].num_rank][discards[1].num_rank - 1]
-            else:
-                return PONE_TABLE[discards[0].num_rank][discards[1].num_rank - 1]
-        else:
-            # If only discarding one card, use the average value of the applicable row in the table
-            if dealer:
-                return sum(DEALER_TABLE[discards[0].num_rank]) / len(DEALER_TABLE[discards[0].num_rank])
-            else:
-                return sum(PONE_TABLE[discards[0].num_rank]) / len(PONE_TABLE[discards[0].num_rank])
+    def expected_crib_points(discards):
+        return crib_points(discards)
@@ -0,0 +1,383 @@
+from hand import Hand
+from message import Message
+from colorama import Fore, Back, Style, init
+from os import system, name
+from typing import List
+import itertools
+
+
+# Renderers draw a Game and wait on the player between steps. The game calls draw whenever its state or messages change
+# and pause wherever a person would want to read what just happened, so the rules never touch the terminal themselves
+# If a renderer doesn't show messages, the game skips putting them together
+
+
+# Draws the board and UI in the terminal, and waits for enter at every pause
+class TerminalRenderer:
+    BOARD_SPACE = Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' '
+    shows_messages = True
+
+    def __init__(self, debug=False):
+        # Initialize colorama to enable styled terminal output on Windows
+        init()
+        self.debug = debug
+
+    # Clear the screen with the appropriate terminal command for the system
+    def clear(self):
+        # Don't clear the screen in debug mode. This helps with debugging because it enables scrollback to see snapshots of game state change
+        if not self.debug:
+            if name == 'nt':
+                system('cls')
+            else:
+                system('clear')
+
+    # Render the top of a score section
+    @staticmethod
+    def render_board_top(starting_point=1) -> List[str]:
+        render_str = Style.BRIGHT + Back.LIGHTYELLOW_EX + \
+            Style.DIM + Fore.BLACK + '  ╓─────╖ '
+        for i in range(60):
+            if i == 0:
+                render_str += '╓'
+            elif i == 59:
+                render_str += '─────╖  '
+            elif i % 5 == 0:
+                render_str += '───╥'
+            else:
+                render_str += '──'
+        render_str += Style.RESET_ALL
+        return render_str
+
+    # Render the bottom of a score section
+    @staticmethod
+    def render_board_bottom(starting_point=1) -> List[str]:
+        render_str = Style.BRIGHT + Back.LIGHTYELLOW_EX + \
+            Style.DIM + Fore.BLACK + '  ╙─────╜ '
+        for i in range(60):
+            if i == 0:
+                render_str += '╙'
+            elif i == 59:
+                render_str += '─────╜  '
+            elif i % 5 == 0:
+                render_str += '───╨'
+            else:
+                render_str += '──'
+        render_str += Style.RESET_ALL
+        return render_str
+
+    # Render a hole with or without a peg for a given score number and player
+    def render_board_hole(self, game, score, player=None):
+        # Hole 121 needs special handling since any player's peg can go there
+        if score == 121:
+            if any(player.peg_at(121) for player in game.players):
+                return Style.RESET_ALL + Style.DIM + \
+                    Back.LIGHTYELLOW_EX + Style.BRIGHT + Fore.BLACK + ' ●'
+            else:
+                return Style.RESET_ALL + Style.DIM + Back.LIGHTYELLOW_EX + Style.BRIGHT + Fore.BLACK + ' ○'
+        # Proper background colors for all players
+        if player == game.players[0]:
+            render_str = Style.RESET_ALL + Style.DIM + \
+                Back.LIGHTRED_EX + Style.BRIGHT + Fore.BLACK
+        elif player == game.players[1]:
+            render_str = Style.RESET_ALL + Style.DIM + \
+                Back.LIGHTGREEN_EX + Style.BRIGHT + Fore.BLACK
+        elif player == game.players[2]:
+            render_str = Style.RESET_ALL + Style.DIM + \
+                Back.LIGHTBLUE_EX + Style.BRIGHT + Fore.BLACK
+        else:
+            render_str = Style.RESET_ALL + Style.DIM + Back.LIGHTYELLOW_EX
+        # Different unicode characters for if a peg is in the hole or not
+        if player.peg_at(score):
+            render_str += ' ●'
+        else:
+            render_str += ' ○'
+        return render_str
+
+    # Render the score section of the board
+    def render_board_score(self, game, starting_point=1):
+        # Vertical separator character constant
+        VERT = Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + '║'
+        # Separate strings for each line of the score
+        if len(game.players) == 2:
+            render_strs = [self.BOARD_SPACE * 2,
+                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2]
+        else:
+            render_strs = [self.BOARD_SPACE * 2,
+                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2,
+                           self.BOARD_SPACE * 2, self.BOARD_SPACE * 2]
+
+        # Render holes -1 through 60
+        if starting_point == 1:
+            # Render the starting line
+            render_strs[0] += VERT
+            render_strs[1] += Style.BRIGHT + \
+                Back.LIGHTYELLOW_EX + Fore.BLACK + '╠═════╣ '
+            render_strs[2] += VERT
+            if len(game.players) == 3:
+                render_strs[3] += Style.BRIGHT + \
+                    Back.LIGHTYELLOW_EX + Fore.BLACK + '╠═════╣ '
+                render_strs[4] += VERT
+            for i in [-1, 0]:
+                render_strs[0] += self.render_board_hole(game, i, game.players[0])
+                render_strs[2] += self.render_board_hole(game, i, game.players[1])
+                if len(game.players) == 3:
+                    render_strs[4] += self.render_board_hole(game, i, game.players[2])
+            render_strs[0] += ' ' + VERT + self.BOARD_SPACE
+            render_strs[2] += ' ' + VERT + self.BOARD_SPACE
+            if len(game.players) == 3:
+                render_strs[4] += ' ' + VERT + self.BOARD_SPACE
+            # Render the scores
+            for i in range(1, 61):
+                # Left side
+                if i == 1:
+                    render_strs[0] += '║'
+                    render_strs[1] += '╠'
+                    render_strs[2] += '║'
+                    if len(game.players) == 3:
+                        render_strs[3] += '╠'
+                        render_strs[4] += '║'
+                render_strs[0] += self.render_board_hole(game, i, game.players[0])
+                render_strs[1] += '══'
+                render_strs[2] += self.render_board_hole(game, i, game.players[1])
+                if len(game.players) == 3:
+                    render_strs[3] += '══'
+                    render_strs[4] += self.render_board_hole(game, i, game.players[2])
+                # Right side
+                if i == 60:
+                    render_strs[0] += ' ' + VERT + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    render_strs[1] += '═╣' + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    render_strs[2] += ' ' + VERT + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    if len(game.players) == 3:
+                        render_strs[3] += '═╣' + self.BOARD_SPACE + \
+                            self.BOARD_SPACE + Style.RESET_ALL
+                        render_strs[4] += ' ' + VERT + self.BOARD_SPACE + \
+                            self.BOARD_SPACE + Style.RESET_ALL
+                # Separators
+                elif i % 5 == 0:
+                    render_strs[0] += ' ' + VERT
+                    render_strs[1] += '═╬'
+                    render_strs[2] += ' ' + VERT
+                    if len(game.players) == 3:
+                        render_strs[3] += '═╬'
+                        render_strs[4] += ' ' + VERT
+
+        # Render holes 61-121
+        else:
+            # Render the finish line
+            if len(game.players) == 2:
+                render_strs[0] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+                render_strs[1] += VERT + self.BOARD_SPACE + \
+                    self.render_board_hole(game, 121) + self.BOARD_SPACE * 2 + VERT + self.BOARD_SPACE
+                render_strs[2] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+            elif len(game.players) == 3:
+                render_strs[0] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+                render_strs[1] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+                render_strs[2] += VERT + self.BOARD_SPACE + \
+                    self.render_board_hole(game, 121) + self.BOARD_SPACE * 2 + VERT + self.BOARD_SPACE
+                render_strs[3] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+                render_strs[4] += VERT + self.BOARD_SPACE * \
+                    5 + VERT + self.BOARD_SPACE
+            # Render the scores
+            for i in range(120, 60, -1):
+                # Left side
+                if i == 120:
+                    render_strs[0] += '║'
+                    render_strs[1] += '╠'
+                    render_strs[2] += '║'
+                    if len(game.players) == 3:
+                        render_strs[3] += '╠'
+                        render_strs[4] += '║'
+                render_strs[0] += self.render_board_hole(game, i, game.players[0])
+                render_strs[1] += '══'
+                render_strs[2] += self.render_board_hole(game, i, game.players[1])
+                if len(game.players) == 3:
+                    render_strs[3] += '══'
+                    render_strs[4] += self.render_board_hole(game, i, game.players[2])
+                # Right side
+                if i == 61:
+                    render_strs[0] += ' ' + VERT + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    render_strs[1] += '═╣' + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    render_strs[2] += ' ' + VERT + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                    if len(game.players) == 3:
+                        render_strs[3] += '═╣' + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                        render_strs[4] += ' ' + VERT + self.BOARD_SPACE + \
+                        self.BOARD_SPACE + Style.RESET_ALL
+                # Skunk line
+                elif i == 91:
+                    render_strs[0] += ' ' + VERT
+                    render_strs[1] += '═S'
+                    render_strs[2] += ' ' + VERT
+                    if len(game.players) == 3:
+                        render_strs[3] += '═S'
+                        render_strs[4] += ' ' + VERT
+                # Vertical separators
+                elif (i - 1) % 5 == 0:
+                    render_strs[0] += ' ' + VERT
+                    render_strs[1] += '═╬'
+                    render_strs[2] += ' ' + VERT
+                    if len(game.players) == 3:
+                        render_strs[3] += '═╬'
+                        render_strs[4] += ' ' + VERT
+        return render_strs
+
+    @staticmethod
+    def render_ui_messages(messages, width=80, margin_left=10):
+        render_strs = [' ' * margin_left + '╓' + '─' * width + '╖']
+        for message in messages:
+            render_strs.append(' ' * margin_left + '║ ' +
+                               message.ljust(width) + ' ║')
+        render_strs.append(
+            ' ' * margin_left + '╙' + '─' * width + '╜')
+        return render_strs
+
+    def render_ui_hand(self, game, render_strs, player, width=25, margin_left=35):
+        padded_hand = Message(str(game.players[player].hand))
+        render_strs[0] += ' ' * margin_left + '╓' + '─' * width + '╖'
+        render_strs[1] += ' ' * margin_left + '║' + \
+            'Your hand'.center(width) + '║'
+        render_strs[2] += ' ' * margin_left + '║' + \
+            padded_hand.center(width) + '║'
+        render_strs[3] += ' ' * margin_left + '╙' + '─' * width + '╜'
+        return render_strs
+
+    def render_ui_upcard(self, game, render_strs):
+        render_strs[0] += '     ╓────────╖'
+        render_strs[1] += '     ║ Upcard ║'
+        render_strs[2] += '     ║' + \
+            Message(str(game.upcard)).center(8) + '║'
+        render_strs[3] += '     ╙────────╜'
+        return render_strs
+
+    def render_ui_score(self, game, render_strs, player):
+        if player == 0:
+            player_start = Fore.RED
+        elif player == 1:
+            player_start = Fore.GREEN
+        else:
+            player_start = Fore.BLUE
+        render_strs[0] += '     ╓──────────╖'
+        render_strs[1] += '     ║ ' + player_start + 'P' + \
+            str(player + 1) + ' Score' + Style.RESET_ALL + ' ║'
+        render_strs[2] += '     ║   '
+        if player == game.dealer[0]:
+            render_strs[2] += Back.LIGHTBLACK_EX + Style.BRIGHT
+        render_strs[2] += str(game.players[player].score).center(5) + \
+            Style.RESET_ALL + '  ║'
+        render_strs[3] += '     ╙──────────╜'
+        return render_strs
+
+    def render_ui_pegging(self, game):
+        # Construct the cards piece of the interface
+        card_strs = []
+        # Generate a separate line for each sequence of pegging cards
+        offset = ''
+        for sequence in game.pegging_cards:
+            card_str = offset + ' '.join(str(card) for card in sequence)
+            card_strs.append(Message(str(card_str)))
+            offset += '   ' * len(sequence)
+        # Make height at least 2
+        for i in range(2 - len(card_strs)):
+            card_strs.append(Message(''))
+        # The messages rendering already makes a nice box around it, so no need to reinvent the wheel here
+        if len(game.players) == 2:
+            card_strs = self.render_ui_messages(card_strs, 27, 27)
+        else:
+            card_strs = self.render_ui_messages(card_strs, 40, 20)
+        # Construct the pegging count
+        count_strs = [Message(' Count:'), Message(
+            '   ' + str(game.pegging_count))]
+        count_strs = self.render_ui_messages(count_strs, 10, 50)
+        # Combine them and return the result
+        render_strs = [card + count for card,
+                       count in itertools.zip_longest(card_strs, count_strs, fillvalue='')]
+        return render_strs
+
+    # Draw the board based on current scores
+    def draw_board(self, game):
+        print()
+        # Row 1
+        print(Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' ' * 10 +
+              '0                      10                      20                      30                      40       '
+              '               50                      60  ' + Style.RESET_ALL)
+        print(self.render_board_top(1))
+        for score_str in self.render_board_score(game, 1):
+            print(score_str)
+        print(self.render_board_bottom(1))
+
+        # Row 2
+        print(self.render_board_top(61))
+        for score_str in self.render_board_score(game, 61):
+            print(score_str)
+        print(self.render_board_bottom(61))
+        print(Style.BRIGHT + Back.LIGHTYELLOW_EX + Style.DIM + Fore.BLACK + ' ' * 9 +
+              '120                     110                     100                     90                      80     '
+              '                 70                      60  ' + Style.RESET_ALL)
+
+    # Draw the informational UI
+    def draw_ui(self, game):
+        print()
+        render_strs = ['', '', '', '']
+        if len(game.players) == 2:
+            margin = 35
+        else:
+            margin = 25
+        render_strs = self.render_ui_hand(game, render_strs, 0, margin_left=margin)
+        render_strs = self.render_ui_upcard(game, render_strs)
+        for i in range(len(game.players)):
+            render_strs = self.render_ui_score(game, render_strs, i)
+        for render_str in render_strs:
+            print(render_str)
+        # Print pegging UI if in the pegging phase
+        if game.pegging_count > -1:
+            render_strs = self.render_ui_pegging(game)
+            for render_str in render_strs:
+                print(render_str)
+        render_strs = self.render_ui_messages(game.messages, 103, 20)
+        for render_str in render_strs:
+            print(render_str)
+
+    # Draw the game interface
+    def draw(self, game):
+        self.clear()
+        self.draw_board(game)
+        self.draw_ui(game)
+        if self.debug:
+            print('\n--------------\nDEBUG:')
+            print('WHOLE DECK:')
+            print(Hand(game.deck.cards))
+            print('PLAYER 2 HAND:')
+            print(game.players[1].hand)
+            if len(game.players) == 3:
+                print('PLAYER 3 HAND:')
+                print(game.players[2].hand)
+            print('CRIB:')
+            print(game.crib)
+            print('DEALER:')
+            print(game.dealer)
+
+    # Wait for the player to press enter
+    @staticmethod
+    def pause():
+        input()
+
+
+# Draws nothing and never waits, for games with no one watching
+class NullRenderer:
+    shows_messages = False
+
+    def draw(self, game):
+        pass
+
+    def pause(self):
+        pass
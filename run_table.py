@@ -0,0 +1,50 @@
+# Precomputed run completions for pegging
+# Whether the cards at the end of a round make a run only depends on their numerical ranks, so every set of two or more
+# distinct ranks is mapped ahead of time to the ranks that would complete a run with it, and how long that run would be.
+# Keys are sorted tuples of ranks. Sets that no single rank can complete (and windows with a repeated rank, which can
+# never be part of a run) aren't in the table
+
+
+def build_table():
+    table = {}
+    for mask in range(1 << 13):
+        ranks = tuple(num_rank for num_rank in range(1, 14) if mask >> (num_rank - 1) & 1)
+        if len(ranks) < 2:
+            continue
+        completions = {}
+        for num_rank in range(1, 14):
+            bit = 1 << (num_rank - 1)
+            if mask & bit:
+                continue
+            # A run is a single unbroken stretch of bits
+            combined = mask | bit
+            stretch = combined // (combined & -combined)
+            if stretch & (stretch + 1) == 0:
+                completions[num_rank] = len(ranks) + 1
+        if completions:
+            table[ranks] = completions
+    return table
+
+
+RUN_COMPLETIONS = build_table()
+
+
+# Ranks that would make a run out of every rank given, and the length of that run
+def run_completions(ranks):
+    return RUN_COMPLETIONS.get(tuple(sorted(ranks)), {})
+
+
+# Length of the longest run at the end of a round made by playing num_rank after the given ranks, or 0 if there isn't one
+def run_length(ranks, num_rank):
+    # A run can't repeat a rank, so it can only reach back as far as the last repeat
+    seen = {num_rank}
+    distinct = 0
+    for previous in reversed(ranks):
+        if previous in seen:
+            break
+        seen.add(previous)
+        distinct += 1
+    for length in range(distinct + 1, 2, -1):
+        if RUN_COMPLETIONS.get(tuple(sorted(ranks[1 - length:])), {}).get(num_rank) == length:
+            return length
+    return 0
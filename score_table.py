@@ -0,0 +1,92 @@
+from card import Card
+from cardmask import count_15s_histogram, count_pairs_histogram, count_runs_histogram, count_flush_mask, \
+    count_nibs_mask, count_mask, hand_mask
+from itertools import combinations_with_replacement
+
+
+# Lookup table of hand scores by rank multiset
+# Fifteens, pairs, and runs only depend on the ranks of the cards, and there are only 6,175 rank multisets of five
+# cards (8,555 counting the smaller ones), so every one of them is scored once when this module is imported.
+# Counting a hand is then a table lookup plus the suit checks for flush and nibs
+
+MAX_CARDS = 5
+# A multiset of ranks is keyed by its histogram written in base 5, which is just the sum of these per card
+RANK_KEYS = [0] + [5 ** (num_rank - 1) for num_rank in range(1, 14)]
+
+
+# Get the table key for any iterable of Cards
+def rank_key(cards):
+    return sum(RANK_KEYS[card.num_rank] for card in cards)
+
+
+# Score the fifteens, pairs, and runs of a rank histogram
+def score_histogram(histogram):
+    return 2 * count_15s_histogram(histogram) + count_pairs_histogram(histogram) + count_runs_histogram(histogram)
+
+
+# Every multiset of 0 to 5 ranks with no more than four of any rank
+def rank_multisets():
+    for num_cards in range(MAX_CARDS + 1):
+        for ranks in combinations_with_replacement(range(1, 14), num_cards):
+            if all(ranks.count(num_rank) <= 4 for num_rank in set(ranks)):
+                yield ranks
+
+
+def build_table():
+    table = {}
+    for ranks in rank_multisets():
+        histogram = [0] * 14
+        for num_rank in ranks:
+            histogram[num_rank] += 1
+        table[sum(RANK_KEYS[num_rank] for num_rank in ranks)] = score_histogram(histogram)
+    return table
+
+
+SCORE_TABLE = build_table()
+
+
+# Count a hand of up to four cards plus an upcard (or up to five cards if the upcard isn't set)
+# Anything bigger than the table covers goes through the scoring kernel instead
+def count_hand(cards, upcard=Card(), is_crib=False):
+    if len(cards) + (upcard.index >= 0) > MAX_CARDS:
+        return count_mask(hand_mask(cards), upcard.index, is_crib)
+    mask = hand_mask(cards)
+    return SCORE_TABLE[rank_key(cards) + RANK_KEYS[upcard.num_rank]] + \
+        count_flush_mask(mask, upcard.index, is_crib) + count_nibs_mask(mask, upcard.index)
+
+
+# Count a hand of up to four cards with each of the given upcards
+# The hand is only looked at once: every upcard's score is one of 13 rank outcomes plus a flush/nibs bonus for its suit
+def count_upcards(cards, upcards, is_crib=False):
+    mask = hand_mask(cards)
+    key = rank_key(cards)
+    rank_points = [SCORE_TABLE.get(key + RANK_KEYS[num_rank], 0) for num_rank in range(14)]
+    # The card int of an ace is its suit slot, which is all the flush and nibs checks look at
+    suit_points = [count_flush_mask(mask, slot, is_crib) + count_nibs_mask(mask, slot) for slot in range(4)]
+    return [rank_points[upcard.num_rank] + suit_points[upcard.index & 3] for upcard in upcards]
+
+
+# Check the table against the Hand counting methods for every rank multiset
+# Returns a list of (ranks, table points, counted points) for every multiset that doesn't match
+def verify_table():
+    from hand import Hand
+    mismatches = []
+    for ranks in rank_multisets():
+        # Give repeated ranks different suits so the cards are distinct
+        cards = [Card(num_rank, Card.SUITS[ranks[:i].count(num_rank)]) for i, num_rank in enumerate(ranks)]
+        hand = Hand(cards)
+        points = sum(score.points for score in hand.count_15s())
+        for pair_size in range(2, 5):
+            points += sum(score.points for score in hand.count_pairs(pair_size))
+        points += sum(score.points for score in hand.count_runs())
+        table_points = SCORE_TABLE[rank_key(cards)]
+        if table_points != points:
+            mismatches.append((ranks, table_points, points))
+    return mismatches
+
+
+if __name__ == '__main__':
+    bad = verify_table()
+    for ranks, table_points, points in bad:
+        print('Mismatch for ranks', ranks, 'table has', table_points, 'but counted', points)
+    print(str(len(SCORE_TABLE)) + ' rank multisets checked, ' + str(len(bad)) + ' mismatches.')
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+from game import Game
+from renderer import NullRenderer
+from player import AIPlayer
+from decisions import DiscardRequest, PegPlayRequest
+from multiprocessing import Pool
+from math import sqrt
+import sys
+import time
+
+
+# Self-play tournaments betwixt AI difficulties, with no one watching
+# A matchup is a tuple of difficulties, one per player. Every game gets its own seed from the master seed and its index,
+# so a tournament plays out the same however many processes it's spread over, and any game in it can be replayed alone.
+# Seats rotate from game to game so every difficulty in a matchup sits in every seat equally often.
+# Hard AI decisions depend on how much analysis fits in their time budgets (and on pegging samples cached by earlier
+# games in the same process), so games with a hard AI only repeat closely, not exactly, unless the AIs are
+# deterministic. Deterministic AIs do fixed amounts of work with caches of their own, so their games repeat exactly
+
+DEFAULT_MATCHUPS = [(1, 2), (1, 3), (2, 3)]
+# Standard normal quantile for 95% confidence intervals
+Z = 1.96
+
+
+# Seed for one game of a tournament. Seeds are spread far enough apart that tournaments with nearby master seeds don't
+# share any games
+def game_seed(master_seed, game_index):
+    return master_seed * (1 << 32) + game_index
+
+
+# Parse a matchup like '1v3' or '1v2v3'
+def parse_matchup(text):
+    difficulties = tuple(int(difficulty) for difficulty in text.lower().split('v'))
+    if len(difficulties) not in (2, 3) or any(difficulty not in range(1, 4) for difficulty in difficulties):
+        raise ValueError('Matchups are 2 or 3 difficulties from 1 to 3, like 1v3 or 1v2v3')
+    return difficulties
+
+
+# Every game of a tournament, as (game index, matchup index, seat rotation, difficulties by seat, seed)
+def tournament_games(num_games, matchups, master_seed):
+    games = []
+    for matchup_index, matchup in enumerate(matchups):
+        for game_number in range(num_games):
+            game_index = matchup_index * num_games + game_number
+            rotation = game_number % len(matchup)
+            games.append((game_index, matchup_index, rotation, matchup[rotation:] + matchup[:rotation],
+                          game_seed(master_seed, game_index)))
+    return games
+
+
+# Play some games of a tournament together. Returns the matchup index, seat rotation, winning seat, scores, and skunk
+# level of each game, in order
+# The games are stepped in lockstep: every round, each unfinished game is waiting on one request, and all the AI discards
+# and pegging plays among them are answered with one batch call apiece. That amortizes the per-decision overhead of the
+# AI over the games, and shares its time budgets (and decision time) betwixt them. Easy and medium AIs play exactly the
+# same games however they're batched, and so do deterministic AIs, but otherwise a hard AI's sampling depends on what
+# it's batched with
+def play_games(games, decision_time=None, deterministic=False):
+    instances = [Game(len(difficulties), list(difficulties), decision_time=decision_time, renderer=NullRenderer(),
+                      human=False, seed=seed, deterministic=deterministic) for _, _, _, difficulties, seed in games]
+    # A lone game has nothing to batch with
+    if len(instances) == 1:
+        result = instances[0].play()
+        return [(games[0][1], games[0][2], result.winner, result.scores, result.skunk)]
+    steps = [instance.steps() for instance in instances]
+    requests = [game_steps.send(None) for game_steps in steps]
+    results = [None] * len(games)
+    playing = list(range(len(games)))
+    while playing:
+        answers = {}
+        discards = []
+        plays = []
+        for index in playing:
+            if isinstance(requests[index], DiscardRequest):
+                discards.append(index)
+            elif isinstance(requests[index], PegPlayRequest):
+                plays.append(index)
+        if discards:
+            batch = AIPlayer.select_discards_batch(
+                [instances[index].players[requests[index].player_num] for index in discards],
+                [requests[index].dealer for index in discards], [requests[index].opponent_score for index in discards])
+            answers.update(zip(discards, batch))
+        if plays:
+            batch = AIPlayer.peg_play_batch(
+                [(instances[index].players[requests[index].player_num], requests[index].available_cards,
+                  requests[index].pegging_count, requests[index].opponent_go, requests[index].played_cards)
+                 for index in plays])
+            answers.update(zip(plays, batch))
+        for index in playing:
+            answer = answers[index] if index in answers else instances[index].answer(requests[index])
+            try:
+                requests[index] = steps[index].send(answer)
+            except StopIteration as stop:
+                results[index] = stop.value
+        playing = [index for index in playing if results[index] is None]
+    return [(matchup_index, rotation, result.winner, result.scores, result.skunk)
+            for (_, matchup_index, rotation, _, _), result in zip(games, results)]
+
+
+# Running totals for one matchup. Wins are counted by each difficulty's place in the matchup, not by seat, and margins
+# are the winner's score minus the best of the rest
+class MatchupStats:
+    def __init__(self, matchup):
+        self.matchup = matchup
+        self.games = 0
+        self.wins = [0] * len(matchup)
+        # Games won with a skunk, double skunk, and triple skunk (a double skunk counts as a skunk too, and so on)
+        self.skunks = [0, 0, 0]
+        self.margin_total = 0
+        self.margin_squares = 0
+
+    def add(self, rotation, winner, scores, skunk):
+        self.games += 1
+        self.wins[(winner + rotation) % len(self.matchup)] += 1
+        for level in range(skunk):
+            self.skunks[level] += 1
+        margin = scores[winner] - max(score for seat, score in enumerate(scores) if seat != winner)
+        self.margin_total += margin
+        self.margin_squares += margin * margin
+
+    # 95% Wilson score interval for the win rate of a difficulty's place in the matchup
+    def win_interval(self, place):
+        rate = self.wins[place] / self.games
+        spread = Z * sqrt(rate * (1 - rate) / self.games + Z * Z / (4 * self.games * self.games))
+        center = rate + Z * Z / (2 * self.games)
+        scale = 1 + Z * Z / self.games
+        return max(0.0, (center - spread) / scale), min(1.0, (center + spread) / scale)
+
+    # Average margin and the half-width of its 95% confidence interval
+    def margin_interval(self):
+        average = self.margin_total / self.games
+        variance = max(self.margin_squares / self.games - average * average, 0.0)
+        return average, Z * sqrt(variance / self.games)
+
+    def report(self):
+        names = {1: 'easy', 2: 'medium', 3: 'hard'}
+        lines = [' v '.join(names[difficulty] for difficulty in self.matchup) + ': ' + str(self.games) + ' games']
+        for place, difficulty in enumerate(self.matchup):
+            low, high = self.win_interval(place)
+            lines.append('    {} ({}) wins {:.1%}  [95% CI {:.1%} - {:.1%}]'.format(
+                names[difficulty], place + 1, self.wins[place] / self.games, low, high))
+        lines.append('    skunks {:.1%}, double skunks {:.1%}, triple skunks {:.1%}'.format(
+            *(skunks / self.games for skunks in self.skunks)))
+        average, half_width = self.margin_interval()
+        lines.append('    average winning margin {:.1f} +/- {:.1f} points'.format(average, half_width))
+        return '\n'.join(lines)
+
+
+# Play num_games games of each matchup, spread over a process per core (or played in this process if jobs is 1)
+# Games are played batch_size at a time with play_games, so with a batch size above 1, games with a hard AI play out
+# differently than they would alone unless the AIs are deterministic
+# Results stream back as games finish, and progress is written to stderr. Returns a MatchupStats for each matchup
+def run_tournament(num_games, matchups=None, jobs=None, master_seed=0, decision_time=None, batch_size=1,
+                   deterministic=False):
+    matchups = [tuple(matchup) for matchup in (matchups or DEFAULT_MATCHUPS)]
+    stats = [MatchupStats(matchup) for matchup in matchups]
+    games = tournament_games(num_games, matchups, master_seed)
+    tasks = [(games[i:i + batch_size], decision_time, deterministic) for i in range(0, len(games), batch_size)]
+    if jobs == 1:
+        pool = None
+        results = map(play_games_task, tasks)
+    else:
+        pool = Pool(jobs)
+        # Batches are handed out one at a time so every process stays busy to the end, since games with a hard AI take
+        # far longer than the rest
+        results = pool.imap_unordered(play_games_task, tasks)
+    start = last_update = time.perf_counter()
+    games_played = 0
+    for batch_results in results:
+        for matchup_index, rotation, winner, scores, skunk in batch_results:
+            stats[matchup_index].add(rotation, winner, scores, skunk)
+        games_played += len(batch_results)
+        # Progress is only rewritten a few times a second, since easy games finish far faster than that
+        now = time.perf_counter()
+        if now - last_update >= 0.25 or games_played == len(games):
+            sys.stderr.write('\rPlayed {}/{} games in {:.1f} seconds'.format(games_played, len(games), now - start))
+            last_update = now
+    sys.stderr.write('\n')
+    if pool is not None:
+        pool.close()
+        pool.join()
+    return stats
+
+
+# Pool workers take a single argument
+def play_games_task(task):
+    return play_games(*task)
+
+
+# Every decision of a seeded game betwixt deterministic AIs, as (request type, player number, answer) strings, along
+# with the final scores
+def decision_log(seed, difficulties):
+    game = Game(len(difficulties), list(difficulties), renderer=NullRenderer(), human=False, seed=seed,
+                deterministic=True)
+    steps = game.steps()
+    log = []
+    answer = None
+    try:
+        while True:
+            request = steps.send(answer)
+            answer = game.answer(request)
+            if request.player_num is not None:
+                log.append(' '.join((type(request).__name__, str(request.player_num),
+                                     ' '.join(str(card) for card in answer) if isinstance(answer, list) else
+                                     str(answer))))
+    except StopIteration as stop:
+        return log, stop.value.scores
+
+
+# Check that a seeded game with a hard AI replays the same: play it, play a game with regular (time-budgeted) AIs that
+# fills the shared caches, then play the seeded game again and compare every decision
+# Returns None if the replay matched, or the first decision that didn't as (decision number, first, replay)
+def verify_replay(seed=0, difficulties=(3, 2)):
+    log, scores = decision_log(seed, difficulties)
+    Game(len(difficulties), list(difficulties), renderer=NullRenderer(), human=False, seed=seed + 1).play()
+    replay_log, replay_scores = decision_log(seed, difficulties)
+    for decision, (first, replay) in enumerate(zip(log + [str(scores)], replay_log + [str(replay_scores)])):
+        if first != replay:
+            return decision, first, replay
+    if len(log) != len(replay_log):
+        return min(len(log), len(replay_log)), None, None
+    return None
+
+
+if __name__ == '__main__':
+    for matchup_stats in run_tournament(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+                                        [parse_matchup(text) for text in sys.argv[2:]]):
+        print(matchup_stats.report())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+from card import DECK
+from deck import Deck
+from analysis import evaluate_keeps
+from crib_table import crib_points
+from score_table import count_hand
+from collections import Counter
+from itertools import combinations
+from array import array
+from math import sqrt
+from os import path
+import random
+import sys
+import time
+
+
+# Two-player win probabilities by score
+# Every entry is the probability of winning from the start of a hand, indexed by whether we deal, our score, and the
+# opponent's score. It's built by dynamic programming over the phases of a hand in the order they score: heels and
+# pegging, then the pone's hand, then the dealer's hand and crib. The points each phase scores come from simulated hands
+# where both players keep their best discard by expected net points (counted with the fast scorer) and peg with the
+# rollout policy. Once a hand is over, the deal passes to the other player, so higher scores are solved first.
+# Along with the table, the file keeps the average and standard deviation of each phase's points so decisions can
+# estimate the rest of a hand.
+#
+# File layout (little-endian): magic, version, the average points of each phase in PHASES order, then their standard
+# deviations, then the table: pone entries for every (our score, opponent score) from 0 to 120, followed by dealer
+# entries. Everything after the version is float32
+
+TABLE_FILE = path.join(path.dirname(path.abspath(__file__)), 'win_table.bin')
+MAGIC = b'DSWT'
+VERSION = 1
+WINNING_SCORE = 121
+PHASES = ('pone pegging', 'dealer pegging', 'pone hand', 'dealer hand', 'crib')
+NUM_ENTRIES = 2 * WINNING_SCORE * WINNING_SCORE
+# Simulated hands the point distributions are drawn from
+NUM_HANDS = 20000
+
+
+# Scores must be from 0 to 120, since anything else would land in another entry's row
+def table_index(my_score, opponent_score, dealer):
+    if not (0 <= my_score < WINNING_SCORE and 0 <= opponent_score < WINNING_SCORE):
+        raise ValueError('Scores in the win table are from 0 to ' + str(WINNING_SCORE - 1))
+    return (dealer * WINNING_SCORE + my_score) * WINNING_SCORE + opponent_score
+
+
+# The keep with the best expected net points, along with its discards
+def best_keep(cards, dealer):
+    keeps = list(combinations(cards, 4))
+    upcards = Deck.unseen_cards(cards)
+    best = None
+    for keep, hand_info in zip(keeps, evaluate_keeps(keeps, upcards)):
+        discard = [card for card in cards if card not in keep]
+        crib = crib_points(discard)
+        net_points = hand_info['avg'] + crib if dealer else hand_info['avg'] - crib
+        if best is None or net_points > best[0]:
+            best = (net_points, list(keep), discard)
+    return best[1], best[2]
+
+
+# Simulate hands and count the points of each phase. Returns a list of (pone pegging, dealer pegging including heels,
+# pone hand, dealer hand, crib) tuples
+def simulate_hands(num_hands, seed=0):
+    import numpy as np
+    import peg_rollout
+    rng = random.Random(seed)
+    hands = np.zeros((num_hands, 2, 4), dtype=np.int16)
+    counts = []
+    for hand_index in range(num_hands):
+        cards = rng.sample(DECK, 13)
+        upcard = cards[12]
+        pone_keep, pone_discard = best_keep(cards[:6], False)
+        dealer_keep, dealer_discard = best_keep(cards[6:12], True)
+        hands[hand_index, 0] = [card.num_rank for card in pone_keep]
+        hands[hand_index, 1] = [card.num_rank for card in dealer_keep]
+        counts.append((2 if upcard.rank == 'J' else 0, count_hand(pone_keep, upcard), count_hand(dealer_keep, upcard),
+                       count_hand(pone_discard + dealer_discard, upcard, is_crib=True)))
+    # The pone leads
+    pegging = peg_rollout.play_out(np.random.default_rng(seed), hands, np.zeros((num_hands, 8), dtype=np.int16),
+                                   np.zeros(num_hands, dtype=np.int16), np.zeros(num_hands, dtype=np.int16),
+                                   np.zeros((num_hands, 2), dtype=bool), np.zeros(num_hands, dtype=np.int64))
+    return [(int(pone_pegging), int(dealer_pegging) + heels, pone_hand, dealer_hand, crib)
+            for (pone_pegging, dealer_pegging), (heels, pone_hand, dealer_hand, crib) in zip(pegging, counts)]
+
+
+# Probability distributions of the points scored in pegging (pone and dealer together), by the pone's hand, and by the
+# dealer's hand and crib together, as lists of (points, probability)
+def phase_distributions(samples):
+    def distribution(counter):
+        return [(points, num / len(samples)) for points, num in sorted(counter.items())]
+    return (distribution(Counter((pone, dealer) for pone, dealer, _, _, _ in samples)),
+            distribution(Counter(pone_hand for _, _, pone_hand, _, _ in samples)),
+            distribution(Counter(dealer_hand + crib for _, _, _, dealer_hand, crib in samples)))
+
+
+# Solve the probability that the pone wins from the start of a hand, for every pair of scores below 121
+# Pegging always scores at least a point (for the last card or 31), so every hand moves the game forward, and scores are
+# solved from the highest total down. Within a total, the start of a hand comes first, since the dealer's count can
+# score nothing and hand the deal over at the same total
+def solve_table(pegging, pone_hands, dealer_hands):
+    size = WINNING_SCORE
+    start = [[0.0] * size for _ in range(size)]
+    before_pone_count = [[0.0] * size for _ in range(size)]
+    before_dealer_count = [[0.0] * size for _ in range(size)]
+    for total in range(2 * (size - 1), -1, -1):
+        scores = [(pone, total - pone) for pone in range(max(0, total - size + 1), min(total, size - 1) + 1)]
+        for pone, dealer in scores:
+            probability = 0.0
+            for (pone_points, dealer_points), chance in pegging:
+                pone_out = pone + pone_points >= size
+                dealer_out = dealer + dealer_points >= size
+                # If both peg out during the same hand, call it even
+                if pone_out and dealer_out:
+                    probability += chance / 2
+                elif pone_out:
+                    probability += chance
+                elif not dealer_out:
+                    probability += chance * before_pone_count[pone + pone_points][dealer + dealer_points]
+            start[pone][dealer] = probability
+        for pone, dealer in scores:
+            probability = 0.0
+            for points, chance in dealer_hands:
+                if dealer + points < size:
+                    # The dealer becomes the pone next hand
+                    probability += chance * (1 - start[dealer + points][pone])
+            before_dealer_count[pone][dealer] = probability
+        for pone, dealer in scores:
+            probability = 0.0
+            for points, chance in pone_hands:
+                if pone + points >= size:
+                    probability += chance
+                else:
+                    probability += chance * before_dealer_count[pone + points][dealer]
+            before_pone_count[pone][dealer] = probability
+    return start
+
+
+# Simulate hands and solve the table. Returns (average points of each phase, their standard deviations, table)
+def build_table(num_hands=NUM_HANDS):
+    samples = simulate_hands(num_hands)
+    averages = [sum(sample[phase] for sample in samples) / len(samples) for phase in range(len(PHASES))]
+    deviations = [sqrt(sum((sample[phase] - averages[phase]) ** 2 for sample in samples) / len(samples))
+                  for phase in range(len(PHASES))]
+    start = solve_table(*phase_distributions(samples))
+    table = array('f', [0.0] * NUM_ENTRIES)
+    for my_score in range(WINNING_SCORE):
+        for opponent_score in range(WINNING_SCORE):
+            table[table_index(my_score, opponent_score, False)] = start[my_score][opponent_score]
+            table[table_index(my_score, opponent_score, True)] = 1 - start[opponent_score][my_score]
+    return averages, deviations, table
+
+
+def save_table(stats_and_table, file_name=TABLE_FILE):
+    averages, deviations, table = stats_and_table
+    data = array('f', list(averages) + list(deviations) + list(table))
+    if sys.byteorder == 'big':
+        data.byteswap()
+    with open(file_name, 'wb') as table_file:
+        table_file.write(MAGIC + bytes([VERSION]))
+        data.tofile(table_file)
+
+
+# Load the phase stats and table from disk, or return None if they're missing or from a different version
+# The stats are returned as dicts of phase name to points
+def load_table(file_name=TABLE_FILE):
+    try:
+        with open(file_name, 'rb') as table_file:
+            if table_file.read(5) != MAGIC + bytes([VERSION]):
+                return None
+            data = array('f')
+            data.fromfile(table_file, 2 * len(PHASES) + NUM_ENTRIES)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return (dict(zip(PHASES, data[:len(PHASES)])), dict(zip(PHASES, data[len(PHASES):2 * len(PHASES)])),
+            data[2 * len(PHASES):])
+
+
+# Probability of winning from the start of a hand. Scores can't be negative
+def win_probability(my_score, opponent_score, dealer):
+    if my_score < 0 or opponent_score < 0:
+        raise ValueError('Scores in the win table can\'t be negative')
+    if my_score >= WINNING_SCORE:
+        return 1.0
+    if opponent_score >= WINNING_SCORE:
+        return 0.0
+    return WIN_TABLE[table_index(my_score, opponent_score, dealer)]
+
+
+# Probability of winning once a hand we did or didn't deal is over. If both players got to 121, the pone counted first
+def after_hand(my_score, opponent_score, dealer):
+    if my_score >= WINNING_SCORE and opponent_score >= WINNING_SCORE:
+        return 0.0 if dealer else 1.0
+    return win_probability(my_score, opponent_score, not dealer)
+
+
+AVERAGES, DEVIATIONS, WIN_TABLE = load_table() or (None, None, None)
+
+
+if __name__ == '__main__':
+    start_time = time.perf_counter()
+    save_table(build_table(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_HANDS))
+    print('Wrote ' + TABLE_FILE + ' in ' + str(round(time.perf_counter() - start_time, 1)) + ' seconds.')